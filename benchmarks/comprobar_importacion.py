@@ -0,0 +1,62 @@
+# Comprobación del coste de importar paquete_Iker_Sancho.py_utils.
+# La importación se mide en un intérprete nuevo (para que no haya módulos ya
+# cargados) y falla si:
+#   - se carga alguna de las librerías de gráficos (matplotlib, seaborn o pandas),
+#     que solo deben importarse al llamar a una función de la sección GRÁFICOS.
+#   - la importación tarda más que el tiempo máximo indicado (en segundos).
+#
+# Uso (desde la raíz del repositorio):
+#   python benchmarks/comprobar_importacion.py [tiempo_maximo]
+
+import os
+import sys
+import json
+import subprocess
+
+
+MODULO = "paquete_Iker_Sancho.py_utils"
+LIBRERIAS_PROHIBIDAS = ["matplotlib", "seaborn", "pandas"]
+TIEMPO_MAXIMO = 0.5
+
+# Código que se ejecuta en el intérprete nuevo: importa el módulo y devuelve
+# el tiempo de importación y las librerías prohibidas que se han cargado.
+CODIGO = f"""
+import sys, json, time
+inicio = time.perf_counter()
+import {MODULO}
+tiempo = time.perf_counter() - inicio
+cargadas = sorted({{nombre.split('.')[0] for nombre in sys.modules}} & set({LIBRERIAS_PROHIBIDAS!r}))
+print(json.dumps({{"tiempo": tiempo, "cargadas": cargadas}}))
+"""
+
+
+def medir_importacion():
+
+    raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    salida = subprocess.run([sys.executable, "-c", CODIGO], cwd=raiz, capture_output=True, text=True, check=True)
+    return json.loads(salida.stdout.strip().splitlines()[-1])
+
+
+def main():
+
+    tiempo_maximo = float(sys.argv[1]) if len(sys.argv) > 1 else TIEMPO_MAXIMO
+    resultado = medir_importacion()
+
+    print(f"import {MODULO}: {resultado['tiempo']:.3f} s (máximo {tiempo_maximo:.3f} s)")
+
+    errores = []
+
+    if resultado["cargadas"]:
+        errores.append(f"Se han importado librerías de gráficos: {', '.join(resultado['cargadas'])}")
+
+    if resultado["tiempo"] > tiempo_maximo:
+        errores.append(f"La importación ha tardado {resultado['tiempo']:.3f} s")
+
+    for error in errores:
+        print("ERROR:", error)
+
+    return 1 if errores else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
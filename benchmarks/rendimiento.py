@@ -0,0 +1,221 @@
+# Benchmark de las funciones principales de py_utils sobre datasets sintéticos.
+# Para cada escala (número de individuos x número de variables) se genera un
+# dataset s4 reproducible (misma semilla -> mismos datos) con variables numéricas,
+# categóricas y una clase binaria, y se mide para cada función:
+#   - el tiempo de ejecución (mínimo y mediana de varias repeticiones).
+#   - el pico de memoria reservada durante la llamada (tracemalloc, en una
+#     ejecución aparte para no afectar a los tiempos).
+# Antes de cada llamada se vacía el caché de estadísticos del dataset, de modo
+# que todas las medidas corresponden a un cálculo completo y no a aciertos del
+# caché de las repeticiones anteriores.
+# Los resultados se escriben en JSON y se pueden comparar con un fichero base
+# guardado previamente: se marca como regresión cualquier función cuyo tiempo
+# o memoria supere el de la base en más de la tolerancia indicada.
+#
+# Uso (desde la raíz del repositorio):
+#   python benchmarks/rendimiento.py --escalas 1000x20,10000x50 --salida resultados.json
+#   python benchmarks/rendimiento.py --base resultados.json --tolerancia 0.25
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from paquete_Iker_Sancho import py_s4 as s4
+from paquete_Iker_Sancho import py_utils as utils
+
+
+# Función para generar un dataset s4 sintético y reproducible.
+# Parámetros:
+#   - num_individuos: número de individuos (filas).
+#   - num_variables: número de variables sin contar la clase.
+#   - cardinalidad: número de categorías de las variables categóricas.
+#   - fraccion_categoricas: proporción de variables categóricas.
+#   - semilla: semilla del generador aleatorio.
+# Output:
+#   - dataset: dataset s4 con las variables generadas y una clase binaria ('0'/'1')
+#              como última variable.
+
+def generar_dataset(num_individuos, num_variables, cardinalidad=10, fraccion_categoricas=0.3, semilla=0):
+
+    generador = np.random.default_rng(semilla)
+    num_categoricas = int(round(num_variables * fraccion_categoricas))
+    categorias = np.array([f"cat_{i}" for i in range(cardinalidad)], dtype=object)
+
+    clase = generador.integers(0, 2, num_individuos)
+    columnas = []
+
+    for i in range(num_variables - num_categoricas):
+
+        # Alternar variables continuas (relacionadas con la clase) y enteras
+        if i % 2 == 0:
+            columnas.append(generador.normal(0, 1, num_individuos) + clase * generador.uniform(0, 1))
+        else:
+            columnas.append(generador.integers(0, 100, num_individuos))
+
+    for _ in range(num_categoricas):
+        columnas.append(categorias[generador.integers(0, cardinalidad, num_individuos)])
+
+    columnas.append(np.array(["0", "1"], dtype=object)[clase])
+    return s4.S4Dataset.desde_columnas(columnas)
+
+
+# Funciones medidas. Cada una recibe el dataset y el índice de la clase; las
+# que modifican el dataset trabajan sobre una vista para no alterarlo.
+FUNCIONES = {
+    "igual_anchura": lambda dataset, clase: utils.igual_anchura(dataset, 10),
+    "igual_frecuencia": lambda dataset, clase: utils.igual_frecuencia(dataset, 10),
+    "normalizar_dataset": lambda dataset, clase: utils.normalizar_dataset(dataset),
+    "estandarizar_dataset": lambda dataset, clase: utils.estandarizar_dataset(dataset),
+    "calcular_correlacion": lambda dataset, clase: utils.calcular_correlacion(dataset, formato="matriz"),
+    "calcular_metricas": lambda dataset, clase: utils.calcular_metricas(dataset, clase, supervisado=True),
+    "filtrar_por_condicion": lambda dataset, clase: utils.filtrar_por_condicion(
+        dataset.proyectar(range(dataset.numero_variables)), "Varianza", "menor", 1.0),
+}
+
+
+# Tiempos (en segundos) de varias repeticiones de una función
+def medir_tiempo(funcion, dataset, clase, repeticiones):
+
+    tiempos = []
+
+    for _ in range(repeticiones):
+        dataset.cache.limpiar()
+        inicio = time.perf_counter()
+        funcion(dataset, clase)
+        tiempos.append(time.perf_counter() - inicio)
+
+    return tiempos
+
+
+# Pico de memoria (en bytes) reservada durante una llamada a la función
+def medir_memoria(funcion, dataset, clase):
+
+    dataset.cache.limpiar()
+    tracemalloc.start()
+    try:
+        funcion(dataset, clase)
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return pico
+
+
+# Función para ejecutar el benchmark completo.
+# Parámetros:
+#   - escalas: lista de tuplas (num_individuos, num_variables).
+#   - cardinalidad, semilla: ver generar_dataset.
+#   - repeticiones: número de repeticiones de cada medida de tiempo.
+#   - funciones: nombres de las funciones a medir (por defecto, todas).
+# Output:
+#   - informe: diccionario con el entorno de ejecución y una entrada por
+#              función y escala.
+
+def ejecutar(escalas, cardinalidad=10, semilla=0, repeticiones=3, funciones=None):
+
+    funciones = list(FUNCIONES) if funciones is None else funciones
+    resultados = []
+
+    for num_individuos, num_variables in escalas:
+        dataset = generar_dataset(num_individuos, num_variables, cardinalidad, semilla=semilla)
+        clase = dataset.numero_variables - 1
+
+        for nombre in funciones:
+            tiempos = medir_tiempo(FUNCIONES[nombre], dataset, clase, repeticiones)
+            resultados.append({
+                "funcion": nombre,
+                "num_individuos": num_individuos,
+                "num_variables": num_variables,
+                "tiempo_min": min(tiempos),
+                "tiempo_mediana": statistics.median(tiempos),
+                "memoria_pico": medir_memoria(FUNCIONES[nombre], dataset, clase),
+            })
+
+    return {
+        "entorno": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "plataforma": platform.platform(),
+        },
+        "parametros": {"cardinalidad": cardinalidad, "semilla": semilla, "repeticiones": repeticiones},
+        "resultados": resultados,
+    }
+
+
+# Función para comparar un informe con uno base.
+# Parámetros:
+#   - informe: informe actual (ver ejecutar).
+#   - base: informe base.
+#   - tolerancia: aumento relativo permitido (0.2 = 20 %).
+# Output:
+#   - regresiones: lista de textos describiendo cada regresión encontrada.
+
+def comparar(informe, base, tolerancia=0.2):
+
+    clave = lambda r: (r["funcion"], r["num_individuos"], r["num_variables"])
+    resultados_base = {clave(r): r for r in base["resultados"]}
+    regresiones = []
+
+    for resultado in informe["resultados"]:
+        anterior = resultados_base.get(clave(resultado))
+
+        if anterior is None:
+            continue
+
+        for metrica in ["tiempo_min", "memoria_pico"]:
+            if anterior[metrica] > 0 and resultado[metrica] > anterior[metrica] * (1 + tolerancia):
+                regresiones.append(f"{resultado['funcion']} {resultado['num_individuos']}x{resultado['num_variables']}: "
+                                   f"{metrica} {anterior[metrica]:.4g} -> {resultado[metrica]:.4g}")
+
+    return regresiones
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Benchmark de paquete_Iker_Sancho")
+    parser.add_argument("--escalas", default="1000x20,10000x50", help="escalas NxP separadas por comas")
+    parser.add_argument("--cardinalidad", type=int, default=10)
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--funciones", default=None, help="funciones a medir separadas por comas")
+    parser.add_argument("--salida", default=None, help="fichero JSON donde guardar los resultados")
+    parser.add_argument("--base", default=None, help="fichero JSON base con el que comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.2)
+    argumentos = parser.parse_args()
+
+    escalas = [tuple(int(x) for x in escala.split("x")) for escala in argumentos.escalas.split(",")]
+    funciones = argumentos.funciones.split(",") if argumentos.funciones else None
+
+    informe = ejecutar(escalas, argumentos.cardinalidad, argumentos.semilla, argumentos.repeticiones, funciones)
+
+    for resultado in informe["resultados"]:
+        print(f"{resultado['funcion']:<24} {resultado['num_individuos']:>9}x{resultado['num_variables']:<6} "
+              f"{resultado['tiempo_min'] * 1000:10.2f} ms {resultado['memoria_pico'] / 2**20:10.2f} MiB")
+
+    if argumentos.salida:
+        with open(argumentos.salida, "w", encoding="utf-8") as fichero:
+            json.dump(informe, fichero, indent=2)
+
+    if argumentos.base:
+        with open(argumentos.base, encoding="utf-8") as fichero:
+            regresiones = comparar(informe, json.load(fichero), argumentos.tolerancia)
+
+        for regresion in regresiones:
+            print("REGRESIÓN:", regresion)
+
+        return 1 if regresiones else 0
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,212 @@
+import csv
+import queue
+import itertools
+import threading
+import numpy as np
+from . import py_s4 as s4
+
+
+# Tipos de columna que se pueden inferir de un fichero CSV
+ENTERO = "entero"
+REAL = "real"
+CATEGORICA = s4.CATEGORICA
+
+
+# Función para inferir el tipo de una columna a partir de los valores (texto)
+# de una muestra: entero si todos los valores son enteros, real si todos son
+# números (con valores vacíos, ver el parámetro vacios de leer_csv_por_bloques)
+# y categórica en otro caso.
+def _inferir_tipo(valores):
+
+    no_vacios = [valor for valor in valores if valor != ""]
+
+    if not no_vacios:
+        return CATEGORICA
+
+    try:
+        for valor in no_vacios:
+            int(valor)
+        return ENTERO if len(no_vacios) == len(valores) else REAL
+    except ValueError:
+        pass
+
+    try:
+        for valor in no_vacios:
+            float(valor)
+        return REAL
+    except ValueError:
+        return CATEGORICA
+
+
+# Función para inferir los nombres y los tipos de las columnas de un CSV
+# leyendo solo las primeras filas.
+# Parámetros:
+#   - ruta: ruta del fichero CSV.
+#   - separador: separador de campos.
+#   - cabecera: si es True la primera fila contiene los nombres de las columnas.
+#   - filas_muestra: número de filas que se leen para inferir los tipos.
+#   - codificacion: codificación del fichero.
+# Output:
+#   - nombres: lista con el nombre de cada columna ("Var_1", ... si no hay cabecera).
+#   - tipos: lista con el tipo de cada columna ("entero", "real" o "categorica").
+
+def inferir_tipos_csv(ruta, separador=",", cabecera=True, filas_muestra=1000, codificacion="utf-8"):
+
+    with open(ruta, newline="", encoding=codificacion) as fichero:
+        lector = csv.reader(fichero, delimiter=separador)
+        nombres = next(lector, []) if cabecera else None
+        muestra = list(itertools.islice(lector, filas_muestra))
+
+    num_columnas = len(nombres) if nombres is not None else (len(muestra[0]) if muestra else 0)
+    nombres = nombres if nombres is not None else [f"Var_{i+1}" for i in range(num_columnas)]
+    columnas = list(zip(*muestra)) if muestra else [() for _ in range(num_columnas)]
+
+    return nombres, [_inferir_tipo(columna) for columna in columnas]
+
+
+# Política para los valores vacíos de las columnas numéricas:
+#   - "error": se lanza un ValueError (por defecto).
+#   - "nan": se leen como NaN.
+VACIOS = ["error", "nan"]
+
+
+# Conversión de los valores (texto) de una columna de un bloque a una columna
+# tipada de s4: array np.int64 / np.float64 o ColumnaCategorica.
+def _convertir_columna(valores, tipo, index, tipos, vacios):
+
+    if tipo == ENTERO:
+        try:
+            return np.array(valores, dtype=np.int64)
+        except ValueError:
+            # Valores vacíos o reales que no aparecían en la muestra: la columna
+            # pasa a ser real (también en los bloques siguientes)
+            tipos[index] = tipo = REAL
+
+    if tipo == REAL:
+
+        if vacios == "error" and "" in valores:
+            raise ValueError(f"La columna {index} tiene valores vacíos; indica vacios='nan' para leerlos como NaN.")
+
+        try:
+            return np.array([valor if valor != "" else "nan" for valor in valores], dtype=np.float64)
+        except ValueError:
+            raise ValueError(f"La columna {index} se infirió como numérica pero contiene valores no numéricos; "
+                             f"indica su tipo con el parámetro 'tipos'.") from None
+
+    return s4.ColumnaCategorica.desde_valores(valores)
+
+
+# Lectura y conversión de los bloques de un CSV (generador sin hilos)
+def _bloques_csv(ruta, tam_bloque, separador, cabecera, tipos, codificacion, vacios):
+
+    with open(ruta, newline="", encoding=codificacion) as fichero:
+        lector = csv.reader(fichero, delimiter=separador)
+
+        if cabecera:
+            next(lector, None)
+
+        while True:
+            filas = list(itertools.islice(lector, tam_bloque))
+
+            if not filas:
+                return
+
+            if any(len(fila) != len(tipos) for fila in filas):
+                raise ValueError(f"Cada fila debe tener {len(tipos)} columnas.")
+
+            columnas = [_convertir_columna(valores, tipo, i, tipos, vacios) for i, (valores, tipo) in enumerate(zip(zip(*filas), list(tipos)))]
+            yield s4.S4Dataset._desde_columnas_tipadas(columnas, len(filas))
+
+
+# Marca de fin de la lectura en la cola del hilo lector
+_FIN = object()
+
+
+# Función para leer un CSV por bloques sin cargarlo entero en memoria.
+# Los tipos de las columnas se infieren de una primera muestra (o se indican
+# con 'tipos') y cada bloque se convierte directamente en columnas tipadas de
+# s4, sin pasar por una lista de listas ni por la validación de __init__.
+# Con hilo=True la lectura y conversión de los bloques se hace en un hilo en
+# segundo plano, que prepara el siguiente bloque mientras se procesa el actual.
+# Cada bloque es un dataset s4 independiente, por lo que se puede usar con los
+# métodos incrementales de la librería (Escalador.ajustar_parcial,
+# HistogramaAUC.ajustar_parcial, Discretizador.transformar, ...).
+# Parámetros:
+#   - ruta: ruta del fichero CSV.
+#   - tam_bloque: número de individuos de cada bloque.
+#   - separador, cabecera, filas_muestra, codificacion: ver inferir_tipos_csv.
+#   - tipos: lista con el tipo de cada columna ("entero", "real" o "categorica").
+#            Si no se indica se infiere de las primeras filas_muestra filas.
+#   - vacios: qué hacer con los valores vacíos de las columnas numéricas (ver
+#             VACIOS). Por defecto se lanza un ValueError, ya que los
+#             escaladores, discretizadores y métricas de py_utils no ignoran
+#             los NaN (una columna con un NaN tiene media NaN, por ejemplo).
+#             Con "nan" se leen como NaN y su tratamiento queda a cargo de
+#             quien usa los bloques.
+#   - hilo: si es True los bloques se leen en un hilo en segundo plano.
+#   - bloques_en_cola: número máximo de bloques preparados por adelantado.
+# Output:
+#   - generador de datasets s4 con tam_bloque individuos (el último puede tener menos).
+
+def leer_csv_por_bloques(ruta, tam_bloque=100000, separador=",", cabecera=True, tipos=None,
+                         filas_muestra=1000, codificacion="utf-8", hilo=True, bloques_en_cola=2, vacios="error"):
+
+    if vacios not in VACIOS:
+        raise ValueError("Política de valores vacíos no válida. Políticas válidas: 'error' o 'nan'.")
+
+    if tipos is None:
+        _, tipos = inferir_tipos_csv(ruta, separador, cabecera, filas_muestra, codificacion)
+
+    bloques = _bloques_csv(ruta, tam_bloque, separador, cabecera, list(tipos), codificacion, vacios)
+
+    if not hilo:
+        yield from bloques
+        return
+
+    cola = queue.Queue(maxsize=bloques_en_cola)
+    parar = threading.Event()
+
+    # Deja un elemento en la cola salvo que se haya pedido parar
+    def poner(elemento):
+
+        while not parar.is_set():
+            try:
+                cola.put(elemento, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+
+        return False
+
+    # Hilo lector: deja en la cola cada bloque, la excepción que se produzca o _FIN
+    def leer():
+
+        try:
+            for bloque in bloques:
+                if not poner(bloque):
+                    return
+
+            poner(_FIN)
+        except BaseException as error:
+            poner(error)
+        finally:
+            bloques.close()
+
+    lector = threading.Thread(target=leer, daemon=True)
+    lector.start()
+
+    try:
+        while True:
+            elemento = cola.get()
+
+            if elemento is _FIN:
+                return
+
+            if isinstance(elemento, BaseException):
+                raise elemento
+
+            yield elemento
+    finally:
+        # Si se deja de consumir el generador, se detiene el hilo lector
+        parar.set()
+        lector.join()
@@ -0,0 +1,214 @@
+import time
+import tracemalloc
+import contextlib
+import functools
+
+
+# Instrumentación opcional de las funciones de py_utils:
+# Mientras está activa (dentro de un bloque 'with perfilar():') cada función
+# pública instrumentada y cada una de sus etapas internas dejan un registro con
+# el tiempo empleado, el número de filas y columnas procesadas y, si se pide,
+# el pico de memoria reservada. Cuando no está activa, cada función o etapa solo
+# comprueba una variable global, por lo que el coste es prácticamente nulo.
+#
+# Ejemplo:
+#   with perfil.perfilar() as informe:
+#       utils.calcular_correlacion(dataset)
+#   print(informe.resumen())
+
+# Informe activo (None si la instrumentación está desactivada)
+_informe = None
+
+# Pila de funciones instrumentadas en curso, para asociar cada etapa a su función
+_funciones = []
+
+# Pila de mediciones de memoria en curso (para los picos de etapas anidadas)
+_mediciones_memoria = []
+
+
+# Registros de una sesión de perfilado.
+# Cada registro es un diccionario con las claves:
+#   - funcion: nombre de la función pública.
+#   - etapa: nombre de la etapa (None para el total de la función).
+#   - tiempo: tiempo en segundos.
+#   - filas, columnas: tamaño de los datos procesados (None si no se conoce).
+#   - bytes: pico de memoria reservada durante la función o etapa, por encima
+#            de la memoria reservada al empezar (incluye los temporales que se
+#            liberan antes de terminar). None si no se mide la memoria.
+# Métodos:
+#   - resumen(): tiempo total, número de llamadas y mayor pico de memoria por
+#                (funcion, etapa).
+#   - a_diccionario(): registros y resumen en un diccionario serializable.
+
+class InformePerfil:
+
+    def __init__(self, callback=None, memoria=False):
+        self.registros = []
+        self.callback = callback
+        self.memoria = memoria
+
+    def _registrar(self, registro):
+
+        self.registros.append(registro)
+
+        if self.callback is not None:
+            self.callback(registro)
+
+    def resumen(self):
+
+        resumen = {}
+
+        for registro in self.registros:
+            clave = (registro["funcion"], registro["etapa"])
+            entrada = resumen.setdefault(clave, {"llamadas": 0, "tiempo": 0.0, "bytes": None})
+            entrada["llamadas"] += 1
+            entrada["tiempo"] += registro["tiempo"]
+
+            if registro["bytes"] is not None:
+                entrada["bytes"] = max(entrada["bytes"] or 0, registro["bytes"])
+
+        return resumen
+
+    def a_diccionario(self):
+        return {
+            "registros": list(self.registros),
+            "resumen": [{"funcion": funcion, "etapa": etapa, **entrada} for (funcion, etapa), entrada in self.resumen().items()],
+        }
+
+    def __repr__(self):
+        return f"<InformePerfil registros={len(self.registros)}>"
+
+
+# Activa la instrumentación durante un bloque 'with'.
+# Parámetros:
+#   - callback: función a la que se pasa cada registro en cuanto se produce (opcional).
+#   - memoria: si es True se mide también el pico de memoria reservada (con
+#              tracemalloc, que tiene un coste apreciable).
+# Output:
+#   - informe: InformePerfil con los registros del bloque.
+
+@contextlib.contextmanager
+def perfilar(callback=None, memoria=False):
+
+    global _informe
+
+    anterior = _informe
+    informe = InformePerfil(callback, memoria)
+    iniciar_tracemalloc = memoria and not tracemalloc.is_tracing()
+
+    if iniciar_tracemalloc:
+        tracemalloc.start()
+
+    _informe = informe
+    try:
+        yield informe
+    finally:
+        _informe = anterior
+
+        if iniciar_tracemalloc:
+            tracemalloc.stop()
+
+
+def activo():
+    return _informe is not None
+
+
+# Medición de una etapa (o de una función completa) mientras la
+# instrumentación está activa.
+# El pico de memoria se obtiene con tracemalloc.reset_peak al empezar y el
+# pico de tracemalloc al terminar. Como reset_peak borra también el pico de
+# la medición que la contiene, antes de reiniciarlo se guarda en ella (pico),
+# de modo que cada nivel de anidamiento conserva su propio pico.
+class _Medicion:
+
+    def __init__(self, informe, funcion, etapa, filas, columnas):
+        self.informe = informe
+        self.funcion = funcion
+        self.etapa = etapa
+        self.filas = filas
+        self.columnas = columnas
+
+    def __enter__(self):
+
+        if self.informe.memoria:
+            actual, pico = tracemalloc.get_traced_memory()
+
+            if _mediciones_memoria:
+                exterior = _mediciones_memoria[-1]
+                exterior.pico = max(exterior.pico, pico)
+
+            tracemalloc.reset_peak()
+            self.memoria_inicial = self.pico = actual
+            _mediciones_memoria.append(self)
+
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *excepcion):
+
+        tiempo = time.perf_counter() - self.inicio
+        reservados = None
+
+        if self.informe.memoria:
+            self.pico = max(self.pico, tracemalloc.get_traced_memory()[1])
+            reservados = self.pico - self.memoria_inicial
+            _mediciones_memoria.pop()
+
+        self.informe._registrar({
+            "funcion": self.funcion,
+            "etapa": self.etapa,
+            "tiempo": tiempo,
+            "filas": self.filas,
+            "columnas": self.columnas,
+            "bytes": reservados,
+        })
+        return False
+
+
+# Contexto vacío que se devuelve cuando la instrumentación está desactivada
+_SIN_MEDICION = contextlib.nullcontext()
+
+
+# Etapa interna de una función instrumentada:
+#   with perfil.etapa("pearson", filas=n, columnas=p):
+#       ...
+def etapa(nombre, filas=None, columnas=None):
+
+    if _informe is None:
+        return _SIN_MEDICION
+
+    funcion = _funciones[-1] if _funciones else None
+    return _Medicion(_informe, funcion, nombre, filas, columnas)
+
+
+# Tamaño (filas, columnas) del primer argumento de una función
+def _dimensiones(datos):
+
+    if hasattr(datos, "numero_individuos"):
+        return datos.numero_individuos, datos.numero_variables
+
+    try:
+        return len(datos), None
+    except TypeError:
+        return None, None
+
+
+# Decorador para instrumentar una función pública. Con la instrumentación
+# desactivada solo añade la comprobación de _informe.
+def instrumentar(funcion):
+
+    @functools.wraps(funcion)
+    def envoltorio(*args, **kwargs):
+
+        if _informe is None:
+            return funcion(*args, **kwargs)
+
+        filas, columnas = _dimensiones(args[0]) if args else (None, None)
+        _funciones.append(funcion.__name__)
+        try:
+            with _Medicion(_informe, funcion.__name__, None, filas, columnas):
+                return funcion(*args, **kwargs)
+        finally:
+            _funciones.pop()
+
+    return envoltorio
@@ -1,31 +1,918 @@
+import json
+import bisect
+import struct
+import itertools
+import collections
+import numpy as np
+
+
+# Tipos de variable que forman el esquema de un S4Dataset
+NUMERICA = "numerica"
+CATEGORICA = "categorica"
+BINARIA = "binaria"
+
+
+# Formato binario por columnas de S4Dataset (ver S4Dataset.save / S4Dataset.open):
+#   - 4 bytes: identificador del formato (_MAGICO).
+#   - 4 bytes: versión del formato (uint32, little endian).
+#   - 8 bytes: longitud de la cabecera (uint64, little endian).
+#   - cabecera JSON con el número de individuos y el esquema de cada columna
+#     (tipo, dtype, posición y tamaño de su bloque y, en las categóricas, la
+#     tabla de categorías y sus conteos).
+#   - bloques contiguos con los datos de cada columna (los códigos en las
+#     categóricas), alineados a _ALINEACION bytes desde el inicio de los datos.
+_MAGICO = b"S4DS"
+_VERSION_FORMATO = 1
+_ALINEACION = 64
+_PREAMBULO = struct.Struct("<4sIQ")
+
+
+# Función auxiliar para redondear una posición al siguiente múltiplo de _ALINEACION
+def _alinear(posicion):
+    return -(-posicion // _ALINEACION) * _ALINEACION
+
+
+# Tipo entero más pequeño capaz de representar los códigos 0..num_categorias-1
+# de una variable categórica (o de una variable discretizada).
+def dtype_codigos(num_categorias):
+
+    if num_categorias <= np.iinfo(np.int8).max:
+        return np.int8
+
+    if num_categorias <= np.iinfo(np.int16).max:
+        return np.int16
+
+    return np.int32
+
+
+# Columna categórica codificada por diccionario:
+# Cada valor se guarda como un código entero pequeño (int8/int16/int32) que
+# indexa la tabla de categorías, y se mantiene el número de apariciones de
+# cada categoría. Así las frecuencias, la entropía o la información mutua se
+# calculan sobre los códigos sin volver a recorrer ni hashear los valores.
+# Atributos:
+#   - codigos: array con el código de cada individuo.
+#   - categorias: array de objetos con el valor de cada código.
+#   - conteos: array con el número de individuos de cada categoría (las
+#              categorías sin individuos se conservan en la tabla con 0).
+
+class ColumnaCategorica:
+
+    def __init__(self, codigos, categorias, conteos=None):
+        self.codigos = codigos
+        self.categorias = categorias
+        self.conteos = np.bincount(codigos, minlength=len(categorias)) if conteos is None else conteos
+        self._presentes = int(np.count_nonzero(self.conteos))
+        self._indice = None
+        self._reserva = None
+        self._reserva_categorias = None
+        self._reserva_conteos = None
+
+    # Codificación de una lista (o array) de valores. Se usa una tabla hash
+    # (valor -> código), válida aunque los tipos no sean comparables.
+    @classmethod
+    def desde_valores(cls, valores):
+
+        valores = valores.tolist() if isinstance(valores, np.ndarray) else list(valores)
+        indice = {}
+        codigos = np.fromiter((indice.setdefault(valor, len(indice)) for valor in valores), dtype=np.int64, count=len(valores))
+        categorias = np.fromiter(indice, dtype=object, count=len(indice))
+
+        columna = cls(codigos.astype(dtype_codigos(len(indice))), categorias)
+        columna._indice = indice
+        return columna
+
+    def __len__(self):
+        return len(self.codigos)
+
+    def __repr__(self):
+        return f"<ColumnaCategorica individuos={len(self)}, categorias={len(self.categorias)}>"
+
+    # Copia independiente del estado mutable (los arrays de códigos y
+    # categorías no se modifican nunca en el sitio y se pueden compartir)
+    def copia(self):
+        return ColumnaCategorica(self.codigos, self.categorias, self.conteos.copy())
+
+    # Valores decodificados como array de objetos
+    def valores(self):
+        return self.categorias[self.codigos]
+
+    def tolist(self):
+        return self.valores().tolist()
+
+    # Número de categorías con al menos un individuo (se mantiene al
+    # actualizar los conteos, ver _actualizar_conteos)
+    def num_categorias(self):
+        return self._presentes
+
+    def frecuencias(self):
+        return collections.Counter({categoria: int(conteo) for categoria, conteo in zip(self.categorias.tolist(), self.conteos.tolist()) if conteo})
+
+    # Suma (signo=1) o resta (signo=-1) un individuo en el conteo de cada
+    # código y actualiza el número de categorías presentes. Si hay menos
+    # códigos que categorías solo se tocan las categorías de esos códigos, de
+    # modo que el coste no depende del número de categorías.
+    def _actualizar_conteos(self, codigos, signo):
+
+        if len(codigos) == 1:
+            codigo = codigos[0]
+            presente_antes = self.conteos[codigo] != 0
+            self.conteos[codigo] += signo
+            self._presentes += int(self.conteos[codigo] != 0) - int(presente_antes)
+
+        elif len(codigos) < len(self.conteos):
+            afectadas = np.unique(codigos)
+            presentes_antes = np.count_nonzero(self.conteos[afectadas])
+            np.add.at(self.conteos, codigos, signo)
+            self._presentes += int(np.count_nonzero(self.conteos[afectadas]) - presentes_antes)
+
+        else:
+            self.conteos += signo * np.bincount(codigos, minlength=len(self.conteos)).astype(self.conteos.dtype, copy=False)
+            self._presentes = int(np.count_nonzero(self.conteos))
+
+    # Añade varios valores al final de la columna. Los códigos, la tabla de
+    # categorías y los conteos se amplían sobre reservas con crecimiento
+    # geométrico (ver _extender_array), por lo que añadir valores de uno en
+    # uno tiene coste amortizado constante (sin depender del número de
+    # individuos ni de categorías).
+    def añadir_valores(self, valores):
+
+        if self._indice is None:
+            self._indice = {categoria: codigo for codigo, categoria in enumerate(self.categorias.tolist())}
+
+        valores = valores.tolist() if isinstance(valores, np.ndarray) else valores
+        num_anteriores = len(self.categorias)
+        nuevas = []
+
+        def codificar(valor):
+
+            codigo = self._indice.get(valor)
+
+            if codigo is None:
+                codigo = self._indice[valor] = num_anteriores + len(nuevas)
+                nuevas.append(valor)
+
+            return codigo
+
+        codigos = np.fromiter((codificar(valor) for valor in valores), dtype=np.int64, count=len(valores))
+
+        if nuevas:
+            nuevas = np.fromiter(nuevas, dtype=object, count=len(nuevas))
+            self.categorias, self._reserva_categorias = _extender_array(self.categorias, self._reserva_categorias, nuevas, object)
+            ceros = np.zeros(len(nuevas), dtype=self.conteos.dtype)
+            self.conteos, self._reserva_conteos = _extender_array(self.conteos, self._reserva_conteos, ceros, self.conteos.dtype)
+
+        self.codigos, self._reserva = _extender_array(self.codigos, self._reserva, codigos, dtype_codigos(len(self.categorias)))
+        self._actualizar_conteos(codigos, 1)
+
+    # Resta de los conteos los individuos de las posiciones indicadas, sin
+    # eliminar todavía sus códigos (ver compactar)
+    def descontar(self, posiciones):
+        self._actualizar_conteos(self.codigos[posiciones], -1)
+
+    # Conserva solo los códigos marcados con True en la máscara, en una única
+    # compactación (los conteos ya se han actualizado con descontar)
+    def compactar(self, mascara):
+        self.codigos = self.codigos[mascara]
+        self._reserva = None
+
+
+# Vista de solo lectura de un array (el propio array si ya lo es). Se usa
+# para las columnas que se comparten entre datasets: las transformaciones sin
+# copia no escriben en ellas, sino que crean una columna nueva.
+def _solo_lectura(array):
+
+    if not array.flags.writeable:
+        return array
+
+    vista = array.view()
+    vista.flags.writeable = False
+    return vista
+
+
+# Lista de solo lectura que devuelve S4Dataset.data. Como data se reconstruye
+# a partir de las columnas en cada acceso, modificarla no cambiaría el
+# dataset; en lugar de ignorar los cambios en silencio, los métodos que
+# modifican la lista lanzan un TypeError. Sigue siendo una lista (se compara
+# igual y se puede pasar a S4Dataset), y list(...) devuelve una copia editable
+# (de la lista exterior; las filas también son ListaSoloLectura).
+class ListaSoloLectura(list):
+
+    def _solo_lectura(self, *args, **kwargs):
+        raise TypeError("S4Dataset.data es de solo lectura: use los métodos del dataset para modificarlo.")
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _solo_lectura
+    append = extend = insert = pop = remove = clear = sort = reverse = _solo_lectura
+
+
+    # Copia (y pickle) sin pasar por los métodos que modifican la lista
+    def __reduce__(self):
+        return ListaSoloLectura, (list(self),)
+
+
+# Función auxiliar para añadir valores al final de un array sin copiarlo
+# entero en cada llamada. El array es una vista del principio de una reserva
+# de memoria; si la reserva no tiene sitio (o no es la del array, o cambia el
+# dtype) se crea otra con el doble de capacidad. Como solo se escribe después
+# del final del array, las vistas ya entregadas no se modifican. Si el array
+# es de solo lectura (compartido con otro dataset) y se reutiliza su reserva,
+# el resultado también lo es, ya que su principio sigue compartido.
+# Parámetros:
+#   - array: array actual.
+#   - reserva: reserva de memoria del array (o None).
+#   - nuevos: valores a añadir.
+#   - dtype: dtype del array resultante.
+# Output:
+#   - array: nuevo array (vista de la reserva) con los valores añadidos.
+#   - reserva: reserva de memoria usada.
+
+def _extender_array(array, reserva, nuevos, dtype):
+
+    n, k = len(array), len(nuevos)
+
+    if reserva is None or array.base is not reserva or reserva.dtype != dtype or len(reserva) < n + k:
+        reserva = np.empty(max(2 * n, n + k), dtype=dtype)
+        reserva[:n] = array
+        array = reserva[:0]
+
+    reserva[n:n + k] = nuevos
+    resultado = reserva[:n + k]
+    resultado.flags.writeable = array.flags.writeable
+    return resultado, reserva
+
+
+# Función auxiliar para convertir una lista de valores en una columna tipada.
+#   - enteros: np.int64
+#   - numéricos (int y float mezclados): np.float64
+#   - cualquier otro caso (categóricos o mixtos): ColumnaCategorica
+def _a_columna(valores):
+
+    if isinstance(valores, ColumnaCategorica):
+        return valores.copia()
+
+    if isinstance(valores, np.ndarray):
+
+        if valores.dtype.kind in "biuf":
+            return valores
+
+        return ColumnaCategorica.desde_valores(valores)
+
+    valores = list(valores)
+
+    if all(isinstance(x, int) for x in valores):
+        try:
+            return np.array(valores, dtype=np.int64)
+        except OverflowError:
+            return np.array(valores, dtype=np.float64)
+
+    if all(isinstance(x, (int, float)) for x in valores):
+        return np.array(valores, dtype=np.float64)
+
+    return ColumnaCategorica.desde_valores(valores)
+
+
+# Función auxiliar que convierte los valores a añadir a una columna numérica
+# en un array np.int64 / np.float64, o devuelve None si la columna debe pasar
+# a ser categórica. Los enteros se mantienen como enteros si la columna es
+# entera; en otro caso la columna pasa a ser real.
+def _valores_numericos(columna, valores):
+
+    if isinstance(valores, np.ndarray):
+
+        if valores.dtype.kind not in "biuf":
+            return _valores_numericos(columna, valores.tolist())
+
+        entera = columna.dtype.kind in "iu" and valores.dtype.kind in "biu"
+        return valores.astype(np.int64 if entera else np.float64)
+
+    if columna.dtype.kind in "iu" and all(isinstance(valor, int) for valor in valores):
+        try:
+            return np.array(valores, dtype=np.int64)
+        except OverflowError:
+            pass
+
+    if all(isinstance(valor, (int, float)) for valor in valores):
+        return np.array(valores, dtype=np.float64)
+
+    return None
+
+
+# Función auxiliar para añadir varios valores al final de una columna tipada,
+# promoviendo el tipo de la columna si los nuevos valores lo requieren.
+# Output:
+#   - columna: columna con los valores añadidos.
+#   - reserva: reserva de memoria de la columna numérica (ver _extender_array).
+
+def _extender_columna(columna, reserva, valores):
+
+    if isinstance(columna, ColumnaCategorica):
+        columna.añadir_valores(valores)
+        return columna, None
+
+    nuevos = _valores_numericos(columna, valores)
+
+    if nuevos is None:
+        valores = valores.tolist() if isinstance(valores, np.ndarray) else list(valores)
+        return ColumnaCategorica.desde_valores(columna.tolist() + valores), None
+
+    return _extender_array(columna, reserva, nuevos, np.result_type(columna.dtype, nuevos.dtype))
+
+
+# Función auxiliar que determina el tipo de una columna: las columnas
+# categóricas con exactamente dos categorías presentes son binarias.
+def _tipo(columna):
+
+    if not isinstance(columna, ColumnaCategorica):
+        return NUMERICA
+
+    return BINARIA if columna.num_categorias() == 2 else CATEGORICA
+
+
+# Contador global de versiones de columna. Cada columna de un S4Dataset tiene
+# una versión que se renueva cada vez que la columna cambia, por lo que el par
+# (versión, estadístico) identifica un resultado ya calculado sin ambigüedad,
+# aunque las columnas se eliminen o cambien de posición.
+_versiones_columna = itertools.count()
+
+# Tamaño del caché de estadísticos de un dataset: 4 entradas por variable
+# (momentos, AUC respecto a la clase y margen para otros estadísticos), con
+# un mínimo de 1024 entradas. Crece al añadir variables.
+_ENTRADAS_CACHE_POR_VARIABLE = 4
+_CAPACIDAD_MINIMA_CACHE = 1024
+
+# Los individuos eliminados de uno en uno se compactan cuando superan
+# 1/_FRACCION_ELIMINADOS de los individuos del dataset
+_FRACCION_ELIMINADOS = 8
+
+
+def _capacidad_cache(numero_variables):
+    return max(_CAPACIDAD_MINIMA_CACHE, _ENTRADAS_CACHE_POR_VARIABLE * numero_variables)
+
+
+# Caché de estadísticos por columna con tamaño acotado y expulsión LRU (se
+# descarta la entrada usada hace más tiempo). Las claves son pares
+# (versión de la columna, nombre del estadístico).
+# Atributos:
+#   - capacidad: número máximo de entradas.
+#   - aciertos, fallos: número de consultas resueltas con y sin el caché.
+# Métodos:
+#   - obtener(clave, calcular): valor guardado para la clave o, si no está,
+#                               el resultado de calcular() (que se guarda).
+#   - consultar(clave): (True, valor) si la clave está guardada y (False, None) si no.
+#   - guardar(clave, valor): guarda un valor calculado fuera del caché.
+#   - limpiar(): elimina todas las entradas (los contadores se conservan).
+#   - redimensionar(capacidad): cambia el número máximo de entradas (si es menor
+#                               que el número actual se descartan las más antiguas).
+#   - info(): diccionario con los contadores y el número de entradas.
+
+class CacheEstadisticos:
+
+    def __init__(self, capacidad=_CAPACIDAD_MINIMA_CACHE):
+
+        self.aciertos = 0
+        self.fallos = 0
+        self._entradas = collections.OrderedDict()
+        self.redimensionar(capacidad)
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def __repr__(self):
+        return f"<CacheEstadisticos entradas={len(self)}/{self.capacidad} aciertos={self.aciertos} fallos={self.fallos}>"
+
+    def obtener(self, clave, calcular):
+
+        encontrado, valor = self.consultar(clave)
+
+        if not encontrado:
+            valor = calcular()
+            self.guardar(clave, valor)
+
+        return valor
+
+    def consultar(self, clave):
+
+        if clave in self._entradas:
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+            return True, self._entradas[clave]
+
+        self.fallos += 1
+        return False, None
+
+    def guardar(self, clave, valor):
+
+        self._entradas[clave] = valor
+
+        if len(self._entradas) > self.capacidad:
+            self._entradas.popitem(last=False)
+
+    def limpiar(self):
+        self._entradas.clear()
+
+    def redimensionar(self, capacidad):
+
+        if capacidad < 1:
+            raise ValueError("La capacidad del caché debe ser al menos 1.")
+
+        self.capacidad = capacidad
+
+        while len(self._entradas) > capacidad:
+            self._entradas.popitem(last=False)
+
+    def info(self):
+        return {"aciertos": self.aciertos, "fallos": self.fallos, "entradas": len(self), "capacidad": self.capacidad}
+
+
 class S4Dataset:
-    
+
     # Inicialización
     def __init__(self, data):
-        
+
         # Validación de tipo para asegurar que el dataSet es una lista de listas
         if not isinstance(data, list) or not all(isinstance(row, list) for row in data):
             raise TypeError("El atributo 'data' debe ser una lista de listas.")
-        
+
         # Comprobar que todas las filas tienen la misma longitud
         numero_variables = len(data[0]) if data else 0
         if any(len(row) != numero_variables for row in data):
             raise ValueError("Cada fila debe tener el mismo número de variables (columnas).")
-        
-        # Asignar los datos y dimensiones
-        self.data = data
+
+        # Los datos se guardan internamente por columnas tipadas
+        # (np.int64 / np.float64 para las numéricas y columnas
+        # codificadas por diccionario para las categóricas)
+        self._columnas = [_a_columna(columna) for columna in zip(*data)]
         self.numero_individuos = len(data)
         self.numero_variables = numero_variables
+        self._inferir_esquema()
+
+
+    # Se infiere el esquema (tipo de cada variable) una única vez. Después
+    # se actualiza de forma incremental con cada modificación del dataset.
+    def _inferir_esquema(self):
+        self.tipos = [_tipo(columna) for columna in self._columnas]
+        self._iniciar_estado()
+
+
+    # Cada columna recibe una versión nueva, sin reserva de memoria para
+    # añadir individuos (ver _extender_array) ni individuos eliminados
+    # pendientes de compactar (ver eliminar_individuo), y el dataset un caché
+    # de estadísticos vacío (ver CacheEstadisticos) dimensionado según su
+    # número de variables.
+    def _iniciar_estado(self):
+        self._versiones = [next(_versiones_columna) for _ in self._columnas]
+        self._reservas = [None] * len(self._columnas)
+        self._eliminados = []
+        self.cache = CacheEstadisticos(_capacidad_cache(len(self._columnas)))
+
+
+    # Constructor alternativo a partir de una lista de columnas
+    # (listas o arrays de numpy). Evita la transposición de filas.
+    @classmethod
+    def desde_columnas(cls, columnas):
+
+        columnas = [_a_columna(columna) for columna in columnas]
+
+        numero_individuos = len(columnas[0]) if columnas else 0
+        if any(len(columna) != numero_individuos for columna in columnas):
+            raise ValueError("Cada columna debe tener el mismo número de individuos (filas).")
+
+        dataset = cls.__new__(cls)
+        dataset._columnas = columnas
+        dataset.numero_individuos = numero_individuos
+        dataset.numero_variables = len(columnas)
+        dataset._inferir_esquema()
+        return dataset
+
+
+    # Constructor interno de confianza. Lo usa la propia librería cuando las
+    # columnas ya están tipadas (arrays numéricos o ColumnaCategorica), por lo
+    # que se omiten la validación de longitudes y la codificación (O(n)).
+    @classmethod
+    def _desde_columnas_tipadas(cls, columnas, numero_individuos):
+
+        dataset = cls.__new__(cls)
+        dataset._columnas = list(columnas)
+        dataset.tipos = [_tipo(columna) for columna in dataset._columnas]
+        dataset.numero_individuos = numero_individuos
+        dataset.numero_variables = len(dataset._columnas)
+        dataset._iniciar_estado()
+        return dataset
+
+
+    # Constructor a partir de un array 2D de numpy (individuos x variables).
+    # Las columnas numéricas son vistas del array, sin copiar los datos (con
+    # un array en orden Fortran cada columna es además contigua), de solo
+    # lectura: las transformaciones sin copia crean una columna nueva en
+    # lugar de escribir en el array original. Las columnas de texto, o de
+    # objetos no numéricos, se codifican como categóricas.
+    @classmethod
+    def from_numpy(cls, array):
+
+        array = np.asarray(array)
+
+        if array.ndim != 2:
+            raise ValueError("El array debe tener dos dimensiones (individuos x variables).")
+
+        # En los arrays de objetos el tipo de cada columna se infiere de sus
+        # valores, igual que al crear el dataset a partir de listas
+        if array.dtype == object:
+            columnas = [_a_columna(array[:, j].tolist()) for j in range(array.shape[1])]
+        else:
+            columnas = [_a_columna(array[:, j]) for j in range(array.shape[1])]
+
+        columnas = [columna if isinstance(columna, ColumnaCategorica) else _solo_lectura(columna) for columna in columnas]
+        return cls._desde_columnas_tipadas(columnas, array.shape[0])
+
+
+    # Constructor a partir de un DataFrame de pandas (los nombres de las
+    # columnas no se conservan).
+    #   - columnas numéricas: se comparte el array de numpy de pandas siempre
+    #     que sea posible, como array de solo lectura (igual que en from_numpy).
+    #   - columnas Categorical: se usan directamente sus códigos y categorías;
+    #     los valores ausentes pasan a ser la categoría None.
+    #   - resto de columnas: se codifican como categóricas.
+    @classmethod
+    def from_pandas(cls, dataframe):
+
+        import pandas as pd
+
+        columnas = []
+
+        for _, serie in dataframe.items():
+
+            if isinstance(serie.dtype, pd.CategoricalDtype):
+                codigos = serie.cat.codes.to_numpy()
+                categorias = serie.cat.categories.to_numpy(dtype=object)
+
+                if (codigos < 0).any():
+                    categorias = np.append(categorias, None)
+                    codigos = np.where(codigos < 0, len(categorias) - 1, codigos)
+
+                columnas.append(ColumnaCategorica(codigos.astype(dtype_codigos(len(categorias)), copy=False), categorias))
+
+            elif pd.api.types.is_bool_dtype(serie.dtype) or pd.api.types.is_numeric_dtype(serie.dtype):
+
+                # Los tipos de pandas con valores ausentes (Int64, Float64, ...)
+                # se convierten a np.float64 con NaN
+                if isinstance(serie.dtype, pd.api.extensions.ExtensionDtype):
+                    dtype = np.float64 if serie.hasnans else serie.dtype.numpy_dtype
+                    columnas.append(serie.to_numpy(dtype=dtype, na_value=np.nan))
+                else:
+                    columnas.append(_solo_lectura(serie.to_numpy(copy=False)))
+
+            else:
+                columnas.append(ColumnaCategorica.desde_valores(serie.to_numpy(dtype=object)))
+
+        return cls._desde_columnas_tipadas(columnas, len(dataframe))
+
+
+    # Exportación a un array 2D de numpy (individuos x variables).
+    #   - codigos: si es True, las variables categóricas se exportan con sus
+    #              códigos enteros en lugar de con sus valores.
+    # Si todas las columnas son vistas consecutivas de un mismo array 2D (por
+    # ejemplo, un dataset creado con from_numpy) se devuelve ese array sin
+    # copia, como vista de solo lectura (el caché no detectaría los cambios).
+    # Si hay variables categóricas (y codigos=False) el array es de objetos.
+    def to_numpy(self, codigos=False):
+
+        self._compactar()
+
+        columnas = [columna.codigos if codigos and isinstance(columna, ColumnaCategorica)
+                    else columna.valores() if isinstance(columna, ColumnaCategorica)
+                    else columna for columna in self._columnas]
+
+        base = self._array_base(columnas)
+        if base is not None:
+            return _solo_lectura(base)
+
+        if not columnas:
+            return np.empty((self.numero_individuos, 0))
+
+        if any(columna.dtype == object for columna in columnas):
+            array = np.empty((self.numero_individuos, len(columnas)), dtype=object)
+            for j, columna in enumerate(columnas):
+                array[:, j] = columna
+            return array
+
+        return np.column_stack(columnas)
+
+
+    # Array 2D del que todas las columnas son vistas consecutivas (None si no existe)
+    def _array_base(self, columnas):
+
+        base = columnas[0].base if columnas else None
+
+        if not isinstance(base, np.ndarray) or base.ndim != 2 or base.shape != (self.numero_individuos, len(columnas)):
+            return None
+
+        for j, columna in enumerate(columnas):
+            vista = base[:, j]
+            if (columna.base is not base or columna.dtype != vista.dtype or columna.strides != vista.strides
+                    or columna.__array_interface__["data"][0] != vista.__array_interface__["data"][0]):
+                return None
+
+        return base
+
 
+    # Exportación a un DataFrame de pandas con columnas "Var_1", "Var_2", ...
+    # (o los nombres indicados). Las columnas numéricas se pasan a pandas sin
+    # copia y las categóricas como pandas Categorical construido a partir de
+    # sus códigos (la categoría None pasa a ser un valor ausente).
+    def to_pandas(self, nombres=None):
 
-    # Definición del output para el print    
+        import pandas as pd
+
+        self._compactar()
+        nombres = [f"Var_{i+1}" for i in range(self.numero_variables)] if nombres is None else list(nombres)
+        datos = {}
+
+        for nombre, columna in zip(nombres, self._columnas):
+
+            if isinstance(columna, ColumnaCategorica):
+                codigos = columna.codigos
+                categorias = columna.categorias.tolist()
+
+                if None in categorias:
+                    ausente = categorias.index(None)
+                    codigos = np.where(codigos == ausente, -1, codigos - (codigos > ausente))
+                    del categorias[ausente]
+
+                datos[nombre] = pd.Categorical.from_codes(codigos, categories=pd.Index(categorias, dtype=object))
+
+            else:
+                datos[nombre] = _solo_lectura(columna)
+
+        return pd.DataFrame(datos, copy=False)
+
+
+    # Guarda el dataset en el formato binario por columnas (ver _MAGICO). Las
+    # categorías deben ser valores representables en JSON (texto, números,
+    # booleanos o None).
+    def save(self, ruta):
+
+        self._compactar()
+
+        columnas = []
+        bloques = []
+        posicion = 0
+
+        for columna in self._columnas:
+
+            if isinstance(columna, ColumnaCategorica):
+                categorias = columna.categorias.tolist()
+
+                if not all(categoria is None or isinstance(categoria, (str, int, float, bool)) for categoria in categorias):
+                    raise TypeError("Solo se pueden guardar categorías de tipo texto, número, booleano o None.")
+
+                datos = np.ascontiguousarray(columna.codigos)
+                esquema = {"tipo": CATEGORICA, "categorias": categorias, "conteos": columna.conteos.tolist()}
+            else:
+                datos = np.ascontiguousarray(columna)
+                esquema = {"tipo": NUMERICA}
+
+            posicion = _alinear(posicion)
+            esquema.update({"dtype": datos.dtype.str, "posicion": posicion, "bytes": datos.nbytes})
+            columnas.append(esquema)
+            bloques.append(datos)
+            posicion += datos.nbytes
+
+        cabecera = json.dumps({"numero_individuos": self.numero_individuos, "columnas": columnas}).encode("utf-8")
+        inicio_datos = _alinear(_PREAMBULO.size + len(cabecera))
+
+        with open(ruta, "wb") as fichero:
+            fichero.write(_PREAMBULO.pack(_MAGICO, _VERSION_FORMATO, len(cabecera)))
+            fichero.write(cabecera)
+
+            for esquema, datos in zip(columnas, bloques):
+                fichero.seek(inicio_datos + esquema["posicion"])
+                fichero.write(memoryview(datos).cast("B"))
+
+            # Asegurar que el fichero llega hasta el final del último bloque
+            fichero.truncate(inicio_datos + posicion)
+
+
+    # Abre un dataset guardado con save sin leer los datos: el fichero se
+    # proyecta en memoria (np.memmap) y cada columna es una vista de su bloque,
+    # de forma que solo se leen de disco las columnas (y las partes) que se usan.
+    #   - modo: "r" (solo lectura, por defecto), "c" (las modificaciones no se
+    #           escriben en el fichero) o "r+" (las modificaciones en el sitio se
+    #           escriben en el fichero).
+    @classmethod
+    def open(cls, ruta, modo="r"):
+
+        with open(ruta, "rb") as fichero:
+            magico, version, longitud = _PREAMBULO.unpack(fichero.read(_PREAMBULO.size))
+
+            if magico != _MAGICO:
+                raise ValueError(f"El fichero {ruta} no es un dataset s4.")
+
+            if version != _VERSION_FORMATO:
+                raise ValueError(f"Versión del formato no soportada: {version}.")
+
+            cabecera = json.loads(fichero.read(longitud).decode("utf-8"))
+
+        inicio_datos = _alinear(_PREAMBULO.size + longitud)
+        numero_individuos = cabecera["numero_individuos"]
+        mapa = np.memmap(ruta, dtype=np.uint8, mode=modo) if cabecera["columnas"] and numero_individuos else None
+
+        columnas = []
+
+        for esquema in cabecera["columnas"]:
+            dtype = np.dtype(esquema["dtype"])
+
+            if mapa is None:
+                datos = np.empty(0, dtype=dtype)
+            else:
+                inicio = inicio_datos + esquema["posicion"]
+                datos = mapa[inicio:inicio + esquema["bytes"]].view(dtype)
+
+            if esquema["tipo"] == CATEGORICA:
+                categorias = np.empty(len(esquema["categorias"]), dtype=object)
+                categorias[:] = esquema["categorias"]
+                columnas.append(ColumnaCategorica(datos, categorias, np.array(esquema["conteos"], dtype=np.int64)))
+            else:
+                columnas.append(datos)
+
+        return cls._desde_columnas_tipadas(columnas, numero_individuos)
+
+
+    # Vista de compatibilidad: reconstruye la lista de listas (filas)
+    # a partir de las columnas internas. Es de solo lectura (ListaSoloLectura);
+    # para modificar el dataset se usan sus métodos o se asigna data entero.
+    @property
+    def data(self):
+
+        self._compactar()
+
+        if not self._columnas:
+            return ListaSoloLectura(ListaSoloLectura() for _ in range(self.numero_individuos))
+
+        return ListaSoloLectura(ListaSoloLectura(fila) for fila in zip(*(columna.tolist() for columna in self._columnas)))
+
+
+    @data.setter
+    def data(self, data):
+        self.__init__(data)
+
+
+    # Acceso directo a la i-ésima variable (columna) como array de numpy,
+    # sin necesidad de transponer las filas. Las variables numéricas se
+    # devuelven como vista de solo lectura de la columna interna (escribir
+    # en ella no renovaría la versión ni el caché) y las categóricas
+    # decodificadas (array de objetos).
+    def columna(self, index):
+
+        if index < 0 or index >= self.numero_variables:
+            raise IndexError("Índice de variable fuera de rango.")
+
+        self._compactar()
+
+        columna = self._columnas[index]
+        return columna.valores() if isinstance(columna, ColumnaCategorica) else _solo_lectura(columna)
+
+
+    # Columna interna de la i-ésima variable, sin la vista de solo lectura
+    # (uso interno para las transformaciones sin copia, que después la
+    # registran con _reemplazar_columna_numerica). Las columnas compartidas
+    # con otro dataset siguen siendo de solo lectura.
+    def _columna_interna(self, index):
+
+        self._compactar()
+
+        return self._columnas[index]
+
+
+    # Acceso a la i-ésima variable categórica codificada (códigos, tabla de
+    # categorías y conteos), sin decodificar los valores.
+    def categorica(self, index):
+
+        if index < 0 or index >= self.numero_variables:
+            raise IndexError("Índice de variable fuera de rango.")
+
+        if not isinstance(self._columnas[index], ColumnaCategorica):
+            raise TypeError(f"La variable {index} no es categórica.")
+
+        self._compactar()
+
+        return self._columnas[index]
+
+
+    # Tipo de la i-ésima variable según el esquema ("numerica",
+    # "categorica" o "binaria"), sin recorrer la columna.
+    def tipo(self, index):
+
+        if index < 0 or index >= self.numero_variables:
+            raise IndexError("Índice de variable fuera de rango.")
+
+        return self.tipos[index]
+
+
+    # Frecuencias de cada categoría de la i-ésima variable (None si es
+    # numérica). Se obtienen de los conteos de la columna codificada.
+    def frecuencias(self, index):
+
+        if index < 0 or index >= self.numero_variables:
+            raise IndexError("Índice de variable fuera de rango.")
+
+        columna = self._columnas[index]
+        return columna.frecuencias() if isinstance(columna, ColumnaCategorica) else None
+
+
+    # Sustituye la i-ésima variable por una columna numérica ya tipada
+    # (uso interno para las transformaciones sin copia).
+    def _reemplazar_columna_numerica(self, index, columna):
+
+        self._compactar()
+
+        # Si la columna se ha transformado en su sitio se conserva su reserva
+        if columna is not self._columnas[index]:
+            self._reservas[index] = None
+
+        self._columnas[index] = columna
+        self.tipos[index] = NUMERICA
+        self._versiones[index] = next(_versiones_columna)
+
+
+    # Versión actual de la i-ésima variable: cambia cada vez que la columna
+    # se modifica a través de los métodos del dataset.
+    def version(self, index):
+
+        if index < 0 or index >= self.numero_variables:
+            raise IndexError("Índice de variable fuera de rango.")
+
+        return self._versiones[index]
+
+
+    # Estadístico de la i-ésima variable guardado en el caché del dataset. Si
+    # no está calculado para la versión actual de la columna se calcula con
+    # calcular(columna), donde columna es el array numérico o la
+    # ColumnaCategorica interna, que no se debe modificar.
+    # Parámetros:
+    #   - index: índice de la variable.
+    #   - nombre: nombre del estadístico (forma parte de la clave del caché).
+    #   - calcular: función que calcula el estadístico a partir de la columna.
+    # Output:
+    #   - valor del estadístico.
+
+    def estadistico(self, index, nombre, calcular):
+
+        if index < 0 or index >= self.numero_variables:
+            raise IndexError("Índice de variable fuera de rango.")
+
+        # Los individuos eliminados pendientes solo se compactan si hay que calcular
+        def calcular_columna():
+            self._compactar()
+            return calcular(self._columnas[index])
+
+        return self.cache.obtener((self._versiones[index], nombre), calcular_columna)
+
+
+    # Estadístico de varias variables a la vez. Los valores que no están en
+    # el caché se calculan en una sola llamada a calcular(columnas), que
+    # recibe las columnas internas de esas variables y devuelve un valor por
+    # columna (por ejemplo, el AUC de todas ellas en un único cálculo).
+    # Parámetros:
+    #   - indices: índices de las variables.
+    #   - nombre: nombre del estadístico (forma parte de la clave del caché).
+    #   - calcular: función que calcula el estadístico de una lista de columnas.
+    # Output:
+    #   - lista con el valor del estadístico de cada variable.
+
+    def estadisticos(self, indices, nombre, calcular):
+
+        if any(index < 0 or index >= self.numero_variables for index in indices):
+            raise IndexError("Índice de variable fuera de rango.")
+
+        valores = {}
+        pendientes = []
+
+        for index in indices:
+            encontrado, valor = self.cache.consultar((self._versiones[index], nombre))
+
+            if encontrado:
+                valores[index] = valor
+            elif index not in pendientes:
+                pendientes.append(index)
+
+        if pendientes:
+            self._compactar()
+
+            for index, valor in zip(pendientes, calcular([self._columnas[i] for i in pendientes])):
+                self.cache.guardar((self._versiones[index], nombre), valor)
+                valores[index] = valor
+
+        return [valores[index] for index in indices]
+
+
+    # Definición del output para el print
     def __repr__(self):
         return f"<S4Dataset data=\n{self.data}\n numero_individuos={self.numero_individuos}, numero_variables={self.numero_variables}>"
 
 
     # Printeo de los datos del dataSet
     def print_dataset_data(self):
-        for elem in self.data: 
+        for elem in self.data:
             print(elem)
 
 
@@ -34,41 +921,239 @@ class S4Dataset:
 
         if len(new_individual) != self.numero_variables:
             raise ValueError(f"El nuevo individuo debe tener {self.numero_variables} variables.")
-        
-        self.data.append(new_individual)
-        self.numero_individuos += 1
 
+        self.añadir_individuos([new_individual])
+
+
+    # Método para añadir varios individuos a la vez. filas es una lista de
+    # individuos (listas) o un array 2D de numpy (individuos x variables).
+    # Las filas se validan una vez por lote y cada columna se amplía con una
+    # sola escritura en su reserva de memoria, que crece de forma geométrica,
+    # por lo que el coste es amortizado O(1) por valor añadido.
+    def añadir_individuos(self, filas):
+
+        if isinstance(filas, np.ndarray):
 
-    # Método para eliminar un individuo del dataSet
+            if filas.ndim != 2 or filas.shape[1] != self.numero_variables:
+                raise ValueError(f"Cada nuevo individuo debe tener {self.numero_variables} variables.")
+
+            num_nuevos = filas.shape[0]
+            valores_columnas = [filas[:, i] for i in range(self.numero_variables)]
+
+        else:
+            filas = list(filas)
+
+            if any(len(fila) != self.numero_variables for fila in filas):
+                raise ValueError(f"Cada nuevo individuo debe tener {self.numero_variables} variables.")
+
+            num_nuevos = len(filas)
+            valores_columnas = list(zip(*filas))
+
+        if num_nuevos == 0:
+            return
+
+        # Si una columna numérica pasa a ser categórica, los individuos
+        # eliminados pendientes se quitan antes para que no se cuenten en
+        # la columna codificada
+        if self._eliminados and any(not isinstance(columna, ColumnaCategorica) and _valores_numericos(columna, valores) is None
+                                    for columna, valores in zip(self._columnas, valores_columnas)):
+            self._compactar()
+
+        for i, valores in enumerate(valores_columnas):
+            self._columnas[i], self._reservas[i] = _extender_columna(self._columnas[i], self._reservas[i], valores)
+
+        self._versiones = [next(_versiones_columna) for _ in self._columnas]
+        self.numero_individuos += num_nuevos
+
+        # Actualización incremental del esquema (los conteos de las
+        # columnas categóricas se actualizan al añadir los valores)
+        self.tipos = [_tipo(columna) for columna in self._columnas]
+
+
+    # Método para eliminar un individuo del dataSet. El individuo se marca
+    # como eliminado (los conteos de las categóricas y el esquema se
+    # actualizan en el momento) y las columnas se compactan de una vez
+    # cuando se acumulan más eliminados que 1/_FRACCION_ELIMINADOS de los
+    # individuos, o antes de leerlas. Así cada eliminación cuesta O(p)
+    # amortizado en lugar de copiar todas las columnas.
     def eliminar_individuo(self, index):
-       
+
         if index < 0 or index >= self.numero_individuos:
             raise IndexError("Índice fuera de rango.")
-        
-        del self.data[index]
+
+        posicion = self._posicion_fisica(index)
+
+        for i, columna in enumerate(self._columnas):
+
+            if isinstance(columna, ColumnaCategorica):
+                # Actualización incremental del esquema
+                columna.descontar(slice(posicion, posicion + 1))
+                self.tipos[i] = _tipo(columna)
+
+        bisect.insort(self._eliminados, posicion)
+        self._versiones = [next(_versiones_columna) for _ in self._columnas]
         self.numero_individuos -= 1
 
+        if len(self._eliminados) * _FRACCION_ELIMINADOS > self.numero_individuos:
+            self._compactar()
+
+
+    # Posición en las columnas del individuo index, teniendo en cuenta los
+    # eliminados pendientes de compactar: es index + j, siendo j el primer
+    # eliminado (en orden) con eliminados[j] - j > index. O(log eliminados).
+    def _posicion_fisica(self, index):
+
+        eliminados = self._eliminados
+        inicio, fin = 0, len(eliminados)
+
+        while inicio < fin:
+            medio = (inicio + fin) // 2
+            if eliminados[medio] - medio > index:
+                fin = medio
+            else:
+                inicio = medio + 1
+
+        return index + inicio
+
+
+    # Compactación de las columnas: se quitan de una vez los individuos
+    # marcados como eliminados
+    def _compactar(self):
+
+        if not self._eliminados:
+            return
+
+        conservar = np.ones(self.numero_individuos + len(self._eliminados), dtype=bool)
+        conservar[self._eliminados] = False
+
+        for i, columna in enumerate(self._columnas):
+
+            if isinstance(columna, ColumnaCategorica):
+                columna.compactar(conservar)
+            else:
+                self._columnas[i] = columna[conservar]
+
+        self._eliminados = []
+        self._reservas = [None] * len(self._columnas)
+
+
+    # Método para eliminar varios individuos a la vez, indicados con una
+    # lista de índices o con una máscara booleana (True = eliminar) con un
+    # valor por individuo. Cada columna se compacta una única vez.
+    def eliminar_individuos(self, indices_o_mascara):
+
+        self._compactar()
+
+        seleccion = np.asarray(indices_o_mascara)
+
+        if seleccion.dtype == bool:
+
+            if seleccion.shape != (self.numero_individuos,):
+                raise ValueError(f"La máscara debe tener {self.numero_individuos} valores.")
+
+            conservar = ~seleccion
+
+        else:
+            if seleccion.size == 0:
+                return
+
+            if seleccion.dtype.kind not in "iu":
+                raise TypeError("Los individuos a eliminar deben indicarse con índices enteros o una máscara booleana.")
+
+            if seleccion.min() < 0 or seleccion.max() >= self.numero_individuos:
+                raise IndexError("Índice fuera de rango.")
+
+            conservar = np.ones(self.numero_individuos, dtype=bool)
+            conservar[seleccion] = False
+
+        for i, columna in enumerate(self._columnas):
+
+            if isinstance(columna, ColumnaCategorica):
+                # Actualización incremental del esquema
+                columna.descontar(~conservar)
+                columna.compactar(conservar)
+                self.tipos[i] = _tipo(columna)
+
+            else:
+                self._columnas[i] = columna[conservar]
+
+        self._versiones = [next(_versiones_columna) for _ in self._columnas]
+        self._reservas = [None] * len(self._columnas)
+        self.numero_individuos = int(np.count_nonzero(conservar))
+
 
     # Método para añadir una nueva variable (columna) al dataSet
     def añadir_variable(self, nueva_variable):
-        
+
         if len(nueva_variable) != self.numero_individuos:
             raise ValueError(f"La nueva variable debe tener {self.numero_individuos} valores.")
-        
-        for i, valor in enumerate(nueva_variable):
-            self.data[i].append(valor)
-        
+
+        columna = _a_columna(nueva_variable)
+
+        self._compactar()
+        self._columnas.append(columna)
+        self.tipos.append(_tipo(columna))
+        self._versiones.append(next(_versiones_columna))
+        self._reservas.append(None)
         self.numero_variables += 1
 
+        if self.cache.capacidad < _capacidad_cache(self.numero_variables):
+            self.cache.redimensionar(_capacidad_cache(self.numero_variables))
+
 
     # Método para eliminar la i-ésima variable (columna) del dataSet
     def eliminar_variable(self, index):
-        
+
         if index < 0 or index >= self.numero_variables:
             raise IndexError("Índice de variable fuera de rango.")
-        
-        for row in self.data:
-            del row[index]
-        
+
+        del self._columnas[index]
+        del self.tipos[index]
+        del self._versiones[index]
+        del self._reservas[index]
         self.numero_variables -= 1
 
+
+    # Método para eliminar varias variables (columnas) a la vez. Las listas
+    # de columnas y tipos se reconstruyen una única vez.
+    def eliminar_variables(self, indices):
+
+        eliminar = set(indices)
+
+        if any(index < 0 or index >= self.numero_variables for index in eliminar):
+            raise IndexError("Índice de variable fuera de rango.")
+
+        conservar = [i for i in range(self.numero_variables) if i not in eliminar]
+        self._columnas = [self._columnas[i] for i in conservar]
+        self.tipos = [self.tipos[i] for i in conservar]
+        self._versiones = [self._versiones[i] for i in conservar]
+        self._reservas = [self._reservas[i] for i in conservar]
+        self.numero_variables = len(conservar)
+
+
+    # Vista del dataset con solo las variables indicadas (en ese orden). Las
+    # columnas no se copian hasta que hace falta (copia al escribir): los
+    # arrays numéricos compartidos pasan a ser de solo lectura tanto en la
+    # vista como en el original, de modo que una transformación sin copia de
+    # cualquiera de los dos crea una columna nueva en lugar de modificar la
+    # del otro. De las categóricas solo se copian los conteos. La vista
+    # conserva las versiones de las columnas y comparte el caché de
+    # estadísticos, por lo que reutiliza lo ya calculado sobre el original.
+    def proyectar(self, indices):
+
+        indices = list(indices)
+
+        if any(index < 0 or index >= self.numero_variables for index in indices):
+            raise IndexError("Índice de variable fuera de rango.")
+
+        self._compactar()
+
+        for i in set(indices):
+            if not isinstance(self._columnas[i], ColumnaCategorica):
+                self._columnas[i] = _solo_lectura(self._columnas[i])
+
+        columnas = [self._columnas[i].copia() if isinstance(self._columnas[i], ColumnaCategorica) else self._columnas[i] for i in indices]
+        vista = S4Dataset._desde_columnas_tipadas(columnas, self.numero_individuos)
+        vista._versiones = [self._versiones[i] for i in indices]
+        vista.cache = self.cache
+        return vista
@@ -1,28 +1,199 @@
-import math 
-import collections
+import os
+import json
+import concurrent.futures
+from multiprocessing import shared_memory
 import numpy as np
-import pandas as pd
-import seaborn as sns
 from . import py_s4 as s4
-import matplotlib.pyplot as plt
+from . import py_perfil as perfil
+
+# matplotlib, seaborn y pandas solo se usan en los gráficos, por lo que se
+# importan dentro de las funciones de la sección GRÁFICOS. Así importar
+# py_utils (por ejemplo, en procesos que solo discretizan o calculan
+# métricas) no carga estas librerías.
 
 
 # Función para determinar si una lista es numérica
 # será usada a menudo a lo largo del script
 def es_numerica(variable):
+
+    # Las columnas de un S4Dataset ya están tipadas, basta con mirar el dtype
+    if isinstance(variable, np.ndarray):
+        return variable.dtype.kind in "biuf"
+
+    if isinstance(variable, s4.ColumnaCategorica):
+        return False
+
     return all(isinstance(x, (int, float)) for x in variable)
 
 
+# Función para determinar si la i-ésima variable de un dataset s4 es una
+# clase binaria. Se lee del esquema del dataset; solo en el caso de una
+# clase codificada con números hay que contar los valores distintos.
+def es_clase_binaria(dataset, index):
+
+    if dataset.tipo(index) == s4.BINARIA:
+        return True
+
+    return dataset.tipo(index) == s4.NUMERICA and len(np.unique(dataset.columna(index))) == 2
+
+
+# Función para obtener la i-ésima variable de un dataset s4 sin decodificar:
+# el array de valores si es numérica o la ColumnaCategorica si no lo es.
+def columna_codificada(dataset, index):
+
+    if dataset.tipo(index) == s4.NUMERICA:
+        return dataset.columna(index)
+
+    return dataset.categorica(index)
+
+
 #===================================#
 #         DISCRETIZACIÓN            #
 #===================================#
 
+# Número máximo de elementos (individuos x variables) que se ordenan a la vez
+# al discretizar varias columnas en bloque.
+_ELEMENTOS_POR_BLOQUE = 2 ** 24
+
+# Tipo entero más pequeño capaz de representar los códigos 0..num_intervalos-1
+# de una variable discretizada (el mismo que usan las columnas categóricas de s4).
+dtype_codigos = s4.dtype_codigos
+
+
+# Tabla de etiquetas 'Bin_1', 'Bin_2', ... indexada por código de bin.
+def tabla_bins(num_intervalos):
+    return np.array([f'Bin_{i+1}' for i in range(num_intervalos)], dtype=object)
+
+
+# Función para convertir los códigos de bin (0, 1, ...) en las
+# etiquetas 'Bin_1', 'Bin_2', ... Se usa una tabla de etiquetas
+# indexada por código en lugar de formatear cada valor.
+def etiquetas_bin(codigos, num_intervalos):
+    return tabla_bins(num_intervalos)[codigos]
+
+
+# Función para obtener la columna categórica de una variable discretizada.
+# Los códigos de bin se usan directamente como códigos de la columna, con la
+# tabla de etiquetas 'Bin_i' como categorías, sin construir ninguna etiqueta.
+def columna_bins(codigos, num_intervalos):
+    return s4.ColumnaCategorica(codigos, tabla_bins(num_intervalos))
+
+
+# Función auxiliar para construir el dataset s4 resultado de una transformación.
+# Las columnas sin cambios se reutilizan del dataset original (las categóricas
+# con sus conteos copiados) y las nuevas ya están tipadas, por lo que se usa el
+# constructor interno del dataset, sin validación ni codificación.
+# Parámetros:
+#   - dataset: dataset s4 de partida.
+#   - nuevas_columnas: diccionario índice -> columna (array numérico o ColumnaCategorica).
+# Output:
+#   - dataset s4 con las columnas sustituidas.
+
+def _dataset_transformado(dataset, nuevas_columnas):
+
+    columnas = []
+
+    with perfil.etapa("reconstruccion", dataset.numero_individuos, dataset.numero_variables):
+
+        for i in range(dataset.numero_variables):
+
+            if i in nuevas_columnas:
+                columna = nuevas_columnas[i]
+            elif dataset.tipo(i) == s4.NUMERICA:
+                columna = dataset.columna(i)
+            else:
+                columna = dataset.categorica(i).copia()
+
+            columnas.append(columna)
+
+        return s4.S4Dataset._desde_columnas_tipadas(columnas, dataset.numero_individuos)
+
+
+# Vista perezosa de etiquetas 'Bin_i' sobre un array de códigos de bin.
+# Las etiquetas solo se construyen cuando se accede a ellas.
+class EtiquetasBin:
+
+    def __init__(self, codigos):
+        self.codigos = np.asarray(codigos)
+
+    def __len__(self):
+        return len(self.codigos)
+
+    def __getitem__(self, index):
+
+        if isinstance(index, slice):
+            return EtiquetasBin(self.codigos[index])
+
+        return f'Bin_{int(self.codigos[index]) + 1}'
+
+    def __iter__(self):
+        for codigo in self.codigos:
+            yield f'Bin_{int(codigo) + 1}'
+
+    def __repr__(self):
+        return f"<EtiquetasBin {self.tolist()}>"
+
+    def tolist(self):
+        num_intervalos = int(self.codigos.max()) + 1 if len(self.codigos) else 0
+        return etiquetas_bin(self.codigos, num_intervalos).tolist()
+
+
+# Función para calcular los intervalos de igual anchura de una variable numérica.
+# Parámetros:
+#   - datos: lista o array de valores numéricos.
+#   - num_intervalos: número de intervalos.
+# Output:
+#   - intervalos: lista de tuplas (límite inferior, límite superior).
+
+def intervalos_igual_anchura(datos, num_intervalos):
+
+    datos = np.asarray(datos)
+    return intervalos_desde_limites(datos.min().item(), datos.max().item(), num_intervalos)
+
+
+# Intervalos de igual anchura a partir del mínimo y el máximo de una variable
+# (por ejemplo, los de unos Estadisticos ya calculados), sin leer los datos.
+def intervalos_desde_limites(minimo, maximo, num_intervalos):
+
+    tam_intervalo = (maximo - minimo) / num_intervalos
+    return [(minimo + i * tam_intervalo, minimo + (i + 1) * tam_intervalo) for i in range(num_intervalos)]
+
+
+# Función para asignar cada valor a uno de los intervalos dados.
+# Cada valor se asigna mediante búsqueda binaria sobre los límites
+# inferiores: el intervalo i contiene lim_inferior_i <= valor < lim_superior_i.
+# El último intervalo es cerrado y los valores fuera del rango se asignan
+# al primer o al último intervalo.
+# Parámetros:
+#   - datos: lista o array de valores numéricos.
+#   - intervalos: lista de tuplas (límite inferior, límite superior), o
+#                 directamente un array con los límites inferiores.
+# Output:
+#   - codigos: array con el código (0, 1, ...) del intervalo de cada valor.
+
+def asignar_intervalos(datos, intervalos):
+
+    if isinstance(intervalos, np.ndarray):
+        limites_inferiores = intervalos
+    else:
+        limites_inferiores = np.array([lim_inferior for lim_inferior, _ in intervalos])
+
+    num_intervalos = len(limites_inferiores)
+    indices = np.searchsorted(limites_inferiores, np.asarray(datos), side='right') - 1
+    np.clip(indices, 0, num_intervalos - 1, out=indices)
+
+    return indices.astype(dtype_codigos(num_intervalos))
+
+
 # Discretización por Igual Anchura (Equal Width Binning):
 # Esta función divide el rango de los datos en intervalos de igual tamaño (anchura).
 # En caso de pasar un dataset completo actua solo sobre las variables numéricas.
 # Parámetros:
 #   - data: el dataset que será discretizado. Puede ser una variable única o un dataset tipo s4.
 #   - num_intervalos: número de intervalos en los cuales se divíde el rango de los valores.
+#   - codigos: si es True y se pasa una variable única, se devuelven los códigos enteros de
+#              cada bin (0 para 'Bin_1', 1 para 'Bin_2', ...) en lugar de las etiquetas. Las
+#              etiquetas pueden obtenerse después de forma perezosa con EtiquetasBin(codigos).
 # Output:
 #   - discretized_data: lista de etiquetas de bin asignadas a cada valor en los datos. Es decir, un
 #                       individuo o un conjunto de ellos con valores categóricos
@@ -32,375 +203,1506 @@ def es_numerica(variable):
 #  si el rango de los valores de un atributo es de 0 a 10 y deseas 2 intervalos 
 #  cada intervalo tendría una anchura de 5: (0, 5) (6, 10).
 
-def igual_anchura(dataset, num_intervalos):
+@perfil.instrumentar
+def igual_anchura(dataset, num_intervalos, codigos=False):
     
-    # Subrutina para discretizar una lista de valores
-    # los outputs y los inputs son los mismos que los
-    # de la función en si.
+    # Subrutina para discretizar una lista de valores. Devuelve
+    # los códigos de bin de cada valor y la lista de intervalos.
     def discretizar_unico(datos, num_intervalos):
 
-        minimo = min(datos)
-        maximo = max(datos)
-        tam_intervalo = (maximo - minimo) / num_intervalos
-        intervalos = [(minimo + i * tam_intervalo, minimo + (i + 1) * tam_intervalo) for i in range(num_intervalos)]
+        intervalos = intervalos_igual_anchura(datos, num_intervalos)
+        return asignar_intervalos(datos, intervalos), intervalos
+
+    # Caso 1: Discretizar cada columna si 'dataset' 
+    # es una instancia de dataset s4
+    if isinstance(dataset, s4.S4Dataset):
+
+        dataset_discretizado = {}
+        lista_intervalos = []
         
-        datos_discretizados = []
+        # Se aplica la discretización por cada columna numerica
+        # (las columnas no numéricas se mantienen sin cambios)
+        for i in range(dataset.numero_variables):
+            
+            if dataset.tipo(i) == s4.NUMERICA:
+                with perfil.etapa("discretizacion", dataset.numero_individuos, 1):
+                    datos_discretizados, intervalos = discretizar_unico(dataset.columna(i), num_intervalos)
+                    dataset_discretizado[i] = columna_bins(datos_discretizados, num_intervalos)
+                lista_intervalos.append(intervalos) 
+            
+        # Se construye directamente un objeto s4 a partir de las columnas
+        dataset_discretizado = _dataset_transformado(dataset, dataset_discretizado)
+
+        return dataset_discretizado, lista_intervalos
+
+    # Caso 2: Discretizar directamente una lista de valores si no es S4Dataset
+    else:
+        datos_discretizados, intervalos = discretizar_unico(dataset, num_intervalos)
+
+        if codigos:
+            return datos_discretizados, intervalos
+
+        return etiquetas_bin(datos_discretizados, num_intervalos).tolist(), intervalos
+
+
+
+
+
+# Función para discretizar por igual frecuencia un bloque de columnas numéricas
+# con una única ordenación. El orden es estable, por lo que los valores repetidos
+# conservan el orden original (misma asignación que recorrer los datos ordenados).
+# Parámetros:
+#   - columnas: lista de arrays numéricos de la misma longitud.
+#   - num_intervalos: número de intervalos.
+#   - empates: política para los valores repetidos (ver igual_frecuencia).
+# Output:
+#   - resultados: lista con una tupla (códigos de bin, lista de intervalos) por columna.
+
+def discretizar_bloque_frecuencia(columnas, num_intervalos, empates="posicion"):
+
+    matriz = np.column_stack(columnas).astype(np.float64, copy=False)
+    num_elementos = matriz.shape[0]
+    # Se calcula el tamaño de cada intervalo dividiendo el número de 
+    # elementos por el número de intervalos
+    tam_intervalo = num_elementos // num_intervalos
+
+    orden = np.argsort(matriz, axis=0, kind='stable')
+
+    # Bin que corresponde a cada posición de los datos ordenados
+    posiciones = np.arange(num_elementos)
+    if tam_intervalo > 0:
+        bins_posicion = np.minimum(posiciones // tam_intervalo, num_intervalos - 1)
+    else:
+        bins_posicion = np.full(num_elementos, num_intervalos - 1)
+
+    # Índices inferiores y superiores de cada intervalo en los datos ordenados
+    indices_inferiores = np.arange(num_intervalos) * tam_intervalo
+    indices_superiores = np.append(indices_inferiores[1:], num_elementos)
+    indices_superiores = np.maximum(indices_superiores - 1, indices_inferiores)
+
+    resultados = []
+
+    for c, columna in enumerate(columnas):
+
+        orden_columna = orden[:, c]
+        bins = bins_posicion
+        inferiores = indices_inferiores
+        superiores = indices_superiores
+
+        if empates == "agrupar":
+            # Cada valor toma el bin de su primera aparición en el orden
+            # y se renumeran los bins eliminando los que quedan vacíos
+            ordenados = matriz[orden_columna, c]
+            primera_aparicion = np.searchsorted(ordenados, ordenados, side='left')
+            _, bins = np.unique(bins_posicion[primera_aparicion], return_inverse=True)
+
+            cambios = np.flatnonzero(np.diff(bins)) + 1
+            inferiores = np.append(0, cambios)
+            superiores = np.append(cambios, num_elementos) - 1
+
+        datos_discretizados = np.empty(num_elementos, dtype=dtype_codigos(num_intervalos))
+        datos_discretizados[orden_columna] = bins
+
+        # Los límites se leen de la columna original para conservar su tipo
+        limites_inferiores = columna[orden_columna[inferiores]].tolist()
+        limites_superiores = columna[orden_columna[superiores]].tolist()
+        intervalos = list(zip(limites_inferiores, limites_superiores))
+
+        resultados.append((datos_discretizados, intervalos))
+
+    return resultados
+
+
+# Discretización por Igual Frecuencia (Equal Frequency Binning):
+# Esta función divide los datos en intervalos que contienen aproximadamente la misma cantidad de 
+# individuos. En caso de pasar un dataset completo actua solo sobre las variables numéricas.
+# Parámetros:
+#   - data: el dataset a discretizar. Puede ser una variable única o un dataset s4.
+#   - num_intervalos: número de intervalos en los cuales se dividen los datos.
+#   - empates: política para los valores repetidos.
+#       - "posicion": los empates se reparten por posición entre intervalos contiguos,
+#                     de forma que todos los intervalos tienen el mismo tamaño (por defecto).
+#       - "agrupar": todos los valores iguales quedan en el mismo intervalo (el de su primera
+#                    aparición). Los intervalos que quedan vacíos se eliminan, por lo que
+#                    puede haber menos de num_intervalos.
+#   - codigos: si es True y se pasa una variable única, se devuelven los códigos enteros de
+#              cada bin en lugar de las etiquetas 'Bin_i'.
+# Output:
+#   - discretized_data: lista de etiquetas de bin asignadas a cada valor en los datos. Es decir, un
+#                       individuo o un conjunto de ellos con valores categóricos
+#   - lista_intervalos: lista de tuplas que representan los límites de cada intervalo.
+#
+# Eejemplo:
+# si tienes 10 datos y deseas 2 intervalos, cada intervalo tendría 5 datos y,
+# independientemente del valor de los mismos
+
+@perfil.instrumentar
+def igual_frecuencia(dataset, num_intervalos, empates="posicion", codigos=False):
+
+    if empates not in ["posicion", "agrupar"]:
+        raise ValueError("Política de empates no válida. Políticas válidas: 'posicion' o 'agrupar'.")
+
+    # Caso 1: Discretizar todas las columnas numéricas si 'dataset' 
+    # es una instancia de dataset s4. Las columnas se ordenan por
+    # bloques para limitar la memoria de la matriz de ordenación.
+    if isinstance(dataset, s4.S4Dataset):
         
-        for valor in datos:
-
-            # Asigna cada valor al intervalo adecuado
-            for indice, (lim_inferior, lim_superior) in enumerate(intervalos):
-                
-                # Incluye el valor en el último intervalo si es igual al límite superior
-                if lim_inferior <= valor < lim_superior or (indice == num_intervalos - 1 and valor == lim_superior):
-                    datos_discretizados.append(f'Bin_{indice+1}')
-                    break
+        indices_numericos = [i for i in range(dataset.numero_variables) if dataset.tipo(i) == s4.NUMERICA]
+        columnas_por_bloque = max(1, _ELEMENTOS_POR_BLOQUE // max(1, dataset.numero_individuos))
         
-        return datos_discretizados, intervalos
+        dataset_discretizado = {}
+        lista_intervalos = []
+        
+        for inicio in range(0, len(indices_numericos), columnas_por_bloque):
+            bloque = indices_numericos[inicio:inicio + columnas_por_bloque]
+            with perfil.etapa("discretizacion", dataset.numero_individuos, len(bloque)):
+                resultados = discretizar_bloque_frecuencia([dataset.columna(i) for i in bloque], num_intervalos, empates)
+
+            for i, (datos_discretizados, intervalos) in zip(bloque, resultados):
+                dataset_discretizado[i] = columna_bins(datos_discretizados, num_intervalos)
+                lista_intervalos.append(intervalos)
+
+        # Se convierte el dataset discretizado en un objeto s4
+        dataset_discretizado = _dataset_transformado(dataset, dataset_discretizado)
+
+        return dataset_discretizado, lista_intervalos
+
+    # Caso 2: Discretizar directamente una lista de valores si no es S4Dataset    
+    else:
+        datos_discretizados, intervalos = discretizar_bloque_frecuencia([np.asarray(dataset)], num_intervalos, empates)[0]
+
+        if codigos:
+            return datos_discretizados, intervalos
+
+        return etiquetas_bin(datos_discretizados, num_intervalos).tolist(), intervalos
+
+
+
+# Discretizadores con ajuste y transformación separados:
+# Permiten calcular los intervalos una sola vez sobre unos datos de referencia
+# (ajustar) y aplicarlos después a nuevos lotes de datos (transformar) mediante
+# búsqueda binaria sobre los límites, sin repetir el cálculo de mínimos,
+# máximos u ordenaciones. Los intervalos aprendidos se guardan por columna en
+# el atributo 'intervalos' y pueden serializarse a un diccionario o a JSON.
+# Métodos:
+#   - ajustar(datos): calcula los intervalos de cada columna numérica de un dataset
+#                     s4 (o de una variable única).
+#   - transformar(datos, codigos=False): discretiza nuevos datos con los intervalos
+#                     aprendidos. Devuelve un dataset s4 o una lista de etiquetas
+#                     (los códigos enteros si codigos=True y es una variable única).
+#   - ajustar_transformar(datos, codigos=False): ajustar seguido de transformar.
+#   - a_diccionario() / desde_diccionario(diccionario): serialización.
+#   - guardar(ruta) / cargar(ruta): serialización a un fichero JSON.
+#
+# Al transformar, los valores fuera del rango ajustado se asignan al primer o al
+# último intervalo, y los valores repetidos siempre caen en el mismo intervalo.
+
+class Discretizador:
+
+    # Clave usada para los intervalos cuando se ajusta una variable única
+    VARIABLE_UNICA = -1
+
+    def __init__(self, num_intervalos):
+        self.num_intervalos = num_intervalos
+        self.intervalos = {}
+        self._limites = {}
+
+    # Cálculo de los intervalos de un conjunto de columnas numéricas.
+    # Lo implementa cada discretizador concreto.
+    def _calcular_intervalos(self, columnas):
+        raise NotImplementedError
+
+    def ajustar(self, datos):
+
+        if isinstance(datos, s4.S4Dataset):
+            indices = [i for i in range(datos.numero_variables) if datos.tipo(i) == s4.NUMERICA]
+            columnas = [datos.columna(i) for i in indices]
+        else:
+            indices = [self.VARIABLE_UNICA]
+            columnas = [np.asarray(datos)]
+
+        self.intervalos = dict(zip(indices, self._calcular_intervalos(columnas)))
+        self._limites = {}
+        return self
+
+    # Límites inferiores de los intervalos de una columna como array
+    # de numpy. Se calculan una vez y se reutilizan en cada lote.
+    def _limites_inferiores(self, index):
+
+        if index not in self._limites:
+            self._limites[index] = np.array([lim_inferior for lim_inferior, _ in self.intervalos[index]])
+
+        return self._limites[index]
+
+    # Comprobación de que las columnas numéricas de un lote son las del ajuste
+    def _comprobar_indices(self, datos):
+
+        indices = [i for i in range(datos.numero_variables) if datos.tipo(i) == s4.NUMERICA]
+
+        if indices != list(self.intervalos):
+            raise ValueError("Las columnas numéricas no coinciden con las del ajuste.")
+
+    # Variable única como array numérico
+    @staticmethod
+    def _variable_numerica(datos):
+
+        datos = np.asarray(datos)
+
+        if datos.dtype.kind in "biuf":
+            return datos
+
+        try:
+            return datos.astype(np.float64)
+        except (TypeError, ValueError):
+            raise ValueError("Solo se pueden discretizar variables numéricas.") from None
+
+    def transformar(self, datos, codigos=False):
+
+        if not self.intervalos:
+            raise ValueError("El discretizador debe ajustarse antes de transformar.")
+
+        if isinstance(datos, s4.S4Dataset):
+
+            if self.VARIABLE_UNICA in self.intervalos:
+                raise ValueError("El discretizador se ajustó sobre una variable única, no sobre un dataset s4.")
+
+            self._comprobar_indices(datos)
+            columnas = {}
+
+            for i in self.intervalos:
+                limites = self._limites_inferiores(i)
+                columnas[i] = columna_bins(asignar_intervalos(datos.columna(i), limites), len(limites))
+
+            return _dataset_transformado(datos, columnas)
+
+        if self.VARIABLE_UNICA not in self.intervalos:
+            raise ValueError("El discretizador se ajustó sobre un dataset s4, no sobre una variable única.")
+
+        limites = self._limites_inferiores(self.VARIABLE_UNICA)
+        datos_discretizados = asignar_intervalos(self._variable_numerica(datos), limites)
+
+        if codigos:
+            return datos_discretizados
+
+        return etiquetas_bin(datos_discretizados, len(limites)).tolist()
+
+    def ajustar_transformar(self, datos, codigos=False):
+        return self.ajustar(datos).transformar(datos, codigos)
+
+    # Parámetros del discretizador (sin los intervalos) para la serialización
+    def _parametros(self):
+        return {"num_intervalos": self.num_intervalos}
+
+    def a_diccionario(self):
+        return {
+            "tipo": type(self).__name__,
+            "parametros": self._parametros(),
+            "intervalos": {str(i): [list(intervalo) for intervalo in intervalos] for i, intervalos in self.intervalos.items()},
+        }
+
+    @staticmethod
+    def desde_diccionario(diccionario):
+
+        clases = {clase.__name__: clase for clase in Discretizador.__subclasses__()}
+
+        if diccionario["tipo"] not in clases:
+            raise ValueError(f"Tipo de discretizador desconocido: {diccionario['tipo']}")
+
+        discretizador = clases[diccionario["tipo"]](**diccionario["parametros"])
+        discretizador.intervalos = {int(i): [tuple(intervalo) for intervalo in intervalos] for i, intervalos in diccionario["intervalos"].items()}
+        return discretizador
+
+    def guardar(self, ruta):
+        with open(ruta, "w", encoding="utf-8") as fichero:
+            json.dump(self.a_diccionario(), fichero)
+
+    @staticmethod
+    def cargar(ruta):
+        with open(ruta, encoding="utf-8") as fichero:
+            return Discretizador.desde_diccionario(json.load(fichero))
+
+    def __repr__(self):
+        return f"<{type(self).__name__} num_intervalos={self.num_intervalos}, columnas={list(self.intervalos)}>"
+
+
+# Discretizador por igual anchura (ver igual_anchura). También se puede
+# construir ya ajustado a partir de los estadísticos de las columnas.
+class DiscretizadorIgualAnchura(Discretizador):
+
+    def _calcular_intervalos(self, columnas):
+        return [intervalos_igual_anchura(columna, self.num_intervalos) for columna in columnas]
+
+    @classmethod
+    def desde_estadisticos(cls, num_intervalos, indices, estadisticos):
+
+        discretizador = cls(num_intervalos)
+        discretizador.intervalos = {
+            i: intervalos_desde_limites(float(minimo), float(maximo), num_intervalos)
+            for i, minimo, maximo in zip(indices, estadisticos.minimo, estadisticos.maximo)
+        }
+        return discretizador
+
+
+# Discretizador por igual frecuencia (ver igual_frecuencia). Las columnas
+# se ordenan por bloques igual que en igual_frecuencia.
+class DiscretizadorIgualFrecuencia(Discretizador):
+
+    def __init__(self, num_intervalos, empates="posicion"):
+
+        if empates not in ["posicion", "agrupar"]:
+            raise ValueError("Política de empates no válida. Políticas válidas: 'posicion' o 'agrupar'.")
+
+        super().__init__(num_intervalos)
+        self.empates = empates
+
+    def _calcular_intervalos(self, columnas):
+
+        columnas_por_bloque = max(1, _ELEMENTOS_POR_BLOQUE // max(1, len(columnas[0]) if columnas else 1))
+        intervalos = []
+
+        for inicio in range(0, len(columnas), columnas_por_bloque):
+            resultados = discretizar_bloque_frecuencia(columnas[inicio:inicio + columnas_por_bloque], self.num_intervalos, self.empates)
+            intervalos.extend(intervalos_columna for _, intervalos_columna in resultados)
+
+        return intervalos
+
+    def _parametros(self):
+        return {"num_intervalos": self.num_intervalos, "empates": self.empates}
+
+
+
+
+#===================================#
+#          NORMALIZACIÓN            #
+#===================================#
+
+# Número de filas de cada bloque al recorrer una columna: el bloque (y sus
+# desviaciones respecto a la media) cabe en la caché, de forma que la media,
+# M2, el mínimo y el máximo se calculan leyendo la columna de memoria una vez.
+_FILAS_POR_BLOQUE = 2 ** 15
+
+
+# Media, M2, mínimo y máximo de una columna numérica no vacía en una única
+# pasada por bloques de filas. Los momentos de cada bloque se combinan con la
+# fórmula de Chan et al., igual que Estadisticos.combinar.
+def _momentos_columna(columna):
+
+    n = 0
+    media = m2 = 0.0
+    minimo, maximo = np.inf, -np.inf
+
+    for inicio in range(0, len(columna), _FILAS_POR_BLOQUE):
+        bloque = np.asarray(columna[inicio:inicio + _FILAS_POR_BLOQUE], dtype=np.float64)
+
+        n_bloque = len(bloque)
+        media_bloque = bloque.mean()
+        desviaciones = bloque - media_bloque
+        m2_bloque = float(desviaciones @ desviaciones)
+        minimo = min(minimo, bloque.min())
+        maximo = max(maximo, bloque.max())
+
+        total = n + n_bloque
+        delta = media_bloque - media
+        media += delta * n_bloque / total
+        m2 += m2_bloque + delta ** 2 * n * n_bloque / total
+        n = total
+
+    return media, m2, minimo, maximo
+
+
+# Estadísticos suficientes de un conjunto de columnas numéricas: número de
+# individuos, media, suma de cuadrados de las desviaciones (M2), mínimo y
+# máximo de cada columna. Se pueden calcular por lotes y combinar después
+# (fórmula de combinación paralela de Chan et al.), de forma que no hace
+# falta tener todos los datos en memoria a la vez.
+# Atributos:
+#   - n: número de individuos acumulados.
+#   - media, m2, minimo, maximo: arrays con un valor por columna.
+
+class Estadisticos:
+
+    def __init__(self, n, media, m2, minimo, maximo):
+        self.n = n
+        self.media = media
+        self.m2 = m2
+        self.minimo = minimo
+        self.maximo = maximo
+
+    # Estadísticos de un lote de columnas numéricas de la misma longitud.
+    # Cada columna se lee una sola vez (ver _momentos_columna).
+    @classmethod
+    def desde_columnas(cls, columnas):
+
+        n = len(columnas[0]) if columnas else 0
+        media = np.full(len(columnas), np.nan)
+        m2 = np.full(len(columnas), np.nan)
+        minimo = np.full(len(columnas), np.nan)
+        maximo = np.full(len(columnas), np.nan)
+
+        if n == 0:
+            return cls(n, media, m2, minimo, maximo)
+
+        for k, columna in enumerate(columnas):
+            media[k], m2[k], minimo[k], maximo[k] = _momentos_columna(columna)
+
+        return cls(n, media, m2, minimo, maximo)
+
+    # Estadísticos de las variables numéricas indicadas de un dataset s4. Los
+    # momentos de cada columna se guardan en el caché del dataset, por lo que
+    # solo se recorren las columnas que han cambiado desde el último cálculo.
+    @classmethod
+    def desde_dataset(cls, dataset, indices):
+
+        if dataset.numero_individuos == 0:
+            return cls.desde_columnas([dataset.columna(i) for i in indices])
+
+        momentos = [dataset.estadistico(i, "momentos", _momentos_columna) for i in indices]
+        media, m2, minimo, maximo = (np.array(valores, dtype=np.float64) for valores in zip(*momentos)) if momentos else (np.array([]),) * 4
+
+        return cls(dataset.numero_individuos, media, m2, minimo, maximo)
+
+    # Combinación con los estadísticos de otro lote (o de otro proceso)
+    def combinar(self, otro):
+
+        if self.n == 0:
+            return otro
+
+        if otro.n == 0:
+            return self
+
+        n = self.n + otro.n
+        delta = otro.media - self.media
+        media = self.media + delta * otro.n / n
+        m2 = self.m2 + otro.m2 + delta ** 2 * self.n * otro.n / n
+
+        return Estadisticos(n, media, m2, np.minimum(self.minimo, otro.minimo), np.maximum(self.maximo, otro.maximo))
+
+    @property
+    def varianza(self):
+        return self.m2 / max(self.n, 1)
+
+    @property
+    def desviacion(self):
+        return np.sqrt(self.varianza)
+
+    def __repr__(self):
+        return f"<Estadisticos n={self.n}, columnas={len(self.media)}>"
+
+
+# Escaladores con ajuste incremental:
+# Acumulan los estadísticos de las columnas numéricas lote a lote con
+# ajustar_parcial, de forma que se pueden escalar datasets que no caben en
+# memoria. Los estados parciales calculados en distintos procesos se unen
+# con combinar, y transformar aplica el escalado a cualquier lote posterior
+# sin necesidad de conservar los anteriores.
+# Métodos:
+#   - ajustar_parcial(datos): acumula los estadísticos de un lote (dataset s4
+#                             o variable única).
+#   - ajustar(datos): descarta el estado anterior y ajusta sobre datos.
+#   - combinar(otro): une el estado de otro escalador del mismo tipo.
+#   - transformar(datos, copia=True, dtype=np.float64): escala las columnas numéricas
+#                             de un lote. Con copia=False se modifica el propio lote
+#                             (las columnas que ya son del tipo dtype se sobrescriben
+#                             sin reservar memoria nueva, salvo las de solo lectura). dtype permite elegir el tipo
+#                             de las columnas transformadas (np.float32 o np.float64).
+#   - ajustar_transformar(datos, copia=True, dtype=np.float64): ajustar seguido de transformar.
+
+class Escalador:
+
+    # Clave usada cuando se ajusta una variable única
+    VARIABLE_UNICA = -1
+
+    def __init__(self):
+        self.indices = None
+        self.estadisticos = None
+
+    # Escalador ya ajustado a partir de unos estadísticos calculados
+    # previamente (por ejemplo, los de un ResumenDataset)
+    @classmethod
+    def desde_estadisticos(cls, indices, estadisticos):
+
+        escalador = cls()
+        escalador.indices = list(indices)
+        escalador.estadisticos = estadisticos
+        return escalador
+
+    # Índices y columnas numéricas de un lote
+    def _columnas_numericas(self, datos):
+
+        if isinstance(datos, s4.S4Dataset):
+            indices = [i for i in range(datos.numero_variables) if datos.tipo(i) == s4.NUMERICA]
+            return indices, [datos.columna(i) for i in indices]
+
+        return [self.VARIABLE_UNICA], [np.asarray(datos, dtype=np.float64)]
+
+    def _comprobar_indices(self, indices):
+
+        if self.indices is None:
+            self.indices = indices
+
+        elif indices != self.indices:
+            raise ValueError("Las columnas numéricas no coinciden con las del ajuste.")
+
+    def ajustar_parcial(self, datos):
+
+        indices, columnas = self._columnas_numericas(datos)
+        self._comprobar_indices(indices)
+
+        with perfil.etapa("estadisticos", len(columnas[0]) if columnas else 0, len(columnas)):
+            parcial = Estadisticos.desde_dataset(datos, indices) if isinstance(datos, s4.S4Dataset) else Estadisticos.desde_columnas(columnas)
+            self.estadisticos = parcial if self.estadisticos is None else self.estadisticos.combinar(parcial)
+
+        return self
+
+    def ajustar(self, datos):
+        self.indices = None
+        self.estadisticos = None
+        return self.ajustar_parcial(datos)
+
+    def combinar(self, otro):
+
+        if type(otro) is not type(self):
+            raise TypeError("Solo se pueden combinar escaladores del mismo tipo.")
+
+        if otro.indices is not None:
+            self._comprobar_indices(otro.indices)
+
+        if otro.estadisticos is not None:
+            self.estadisticos = otro.estadisticos if self.estadisticos is None else self.estadisticos.combinar(otro.estadisticos)
+
+        return self
+
+    # Desplazamiento y escala de cada columna: valor -> (valor - desplazamiento) / escala.
+    # Lo implementa cada escalador concreto.
+    def _parametros(self):
+        raise NotImplementedError
+
+    def transformar(self, datos, copia=True, dtype=np.float64):
+
+        if self.estadisticos is None:
+            raise ValueError("El escalador debe ajustarse antes de transformar.")
+
+        indices, columnas = self._columnas_numericas(datos)
+        self._comprobar_indices(indices)
+        desplazamientos, escalas = self._parametros()
+
+        # Sin copia se trabaja sobre las columnas internas del dataset, ya que
+        # columna() devuelve vistas de solo lectura
+        if not copia and isinstance(datos, s4.S4Dataset):
+            columnas = [datos._columna_interna(i) for i in indices]
+        dtype = np.dtype(dtype)
+
+        transformadas = []
+        with perfil.etapa("transformacion", len(columnas[0]) if columnas else 0, len(columnas)):
+            for columna, desplazamiento, escala in zip(columnas, desplazamientos, escalas):
+
+                # Sin copia, la columna se sobrescribe si ya es del tipo pedido
+                # y se puede escribir (las columnas compartidas con otro
+                # dataset son de solo lectura y se sustituyen por una nueva)
+                escribible = columna.dtype == dtype and columna.flags.writeable
+                destino = columna if not copia and escribible else np.empty(len(columna), dtype=dtype)
+
+                # Las columnas con escala 0 (constantes) se transforman en ceros
+                if escala != 0:
+                    np.subtract(columna, desplazamiento, out=destino, casting='same_kind')
+                    np.divide(destino, escala, out=destino, casting='same_kind')
+                else:
+                    destino[:] = 0
+
+                transformadas.append(destino)
+
+        # Caso variable única
+        if not isinstance(datos, s4.S4Dataset):
+
+            if copia:
+                return transformadas[0].tolist()
+
+            if isinstance(datos, np.ndarray):
+                if datos.dtype.kind != "f":
+                    raise TypeError("Solo se pueden transformar sin copia arrays de números reales.")
+
+                if transformadas[0] is not datos:
+                    datos[:] = transformadas[0]
+            else:
+                datos[:] = transformadas[0].tolist()
+
+            return datos
+
+        # Caso dataset s4 sin copia: se sustituyen las columnas del propio dataset
+        if not copia:
+            for i, columna in zip(indices, transformadas):
+                datos._reemplazar_columna_numerica(i, columna)
+
+            return datos
+
+        return _dataset_transformado(datos, dict(zip(indices, transformadas)))
+
+    def ajustar_transformar(self, datos, copia=True, dtype=np.float64):
+        return self.ajustar(datos).transformar(datos, copia, dtype)
+
+    def __repr__(self):
+        n = self.estadisticos.n if self.estadisticos is not None else 0
+        return f"<{type(self).__name__} columnas={self.indices}, n={n}>"
+
+
+# Escalador al rango [0, 1] a partir del mínimo y el máximo acumulados
+class EscaladorMinMax(Escalador):
+
+    def _parametros(self):
+        return self.estadisticos.minimo, self.estadisticos.maximo - self.estadisticos.minimo
+
+
+# Función para normalizar las variables numéricas en un dataset o una variable única.
+# La normalización ajusta los valores de los datos a un rango entre 0 y 1.
+# Parámetros:
+#   - dataset: dataset a normalizar. Puede ser una variable numérica o un dataset tipo s4.
+#   - copia: si es False se normaliza el propio dataset (o lista) en lugar de crear uno nuevo.
+#   - dtype: tipo de las columnas normalizadas (np.float64 por defecto o np.float32).
+# Output:
+#   - datos_transformados: variable numérica única o conjunto de datos con los valores 
+#                          normalizados para cada columna numérica.
+
+@perfil.instrumentar
+def normalizar_dataset(dataset, copia=True, dtype=np.float64):
+
+    # Caso 1: Si dataset es una variable única (lista de valores numéricos)
+    if isinstance(dataset, list) and es_numerica(dataset):
+        return EscaladorMinMax().ajustar_transformar(dataset, copia, dtype)
+
+    # Caso 2: Si el dataset es una instancia del tipo s4. Cada columna
+    # numérica se normaliza con su mínimo y su máximo.
+    datos_transformados = dataset
+
+    try:
+        datos_transformados = EscaladorMinMax().ajustar_transformar(dataset, copia, dtype)
+    except (TypeError, ValueError, IndexError) as e:
+        print("Error:", e)
+
+    return datos_transformados
+
+
+
+#===================================#
+#        ESTANDARIZACIÓN            #
+#===================================#
+
+# Escalador a media 0 y desviación estándar 1 a partir de la media y la
+# varianza acumuladas
+class EscaladorEstandar(Escalador):
+
+    def _parametros(self):
+        return self.estadisticos.media, self.estadisticos.desviacion
+
+
+# Función para estandarizar las variables numéricas en un dataset o en una variable único.
+# La estandarización ajusta los valores de los datos de cada columna para que tengan una 
+# media de 0 y desviación estándar de 1.
+# Parámetros:
+#   - dataset: datset a estandarizar. Puede ser una lista de valores numéricos o un dataset s4.
+#   - copia: si es False se estandariza el propio dataset (o lista) en lugar de crear uno nuevo.
+#   - dtype: tipo de las columnas estandarizadas (np.float64 por defecto o np.float32).
+# Output:
+#   - datos_transformados: conjunto de datos con los valores estandarizados para cada columna numérica.
+
+@perfil.instrumentar
+def estandarizar_dataset(dataset, copia=True, dtype=np.float64):
+
+    # Caso 1:  Si dataset es una variable único (lista de valores numéricos)
+    if isinstance(dataset, list) and es_numerica(dataset):
+        return EscaladorEstandar().ajustar_transformar(dataset, copia, dtype)
+
+    # Caso 2: Si dataset es un dataset s4 completo. Cada columna
+    # numérica se estandariza con su media y su desviación estándar.
+    datos_transformados = dataset
+
+    try:
+        datos_transformados = EscaladorEstandar().ajustar_transformar(dataset, copia, dtype)
+    except (TypeError, ValueError, IndexError) as e:
+        print("Error:", e)
+
+    return datos_transformados
+
+
+
+#===================================#
+#          CORRELACIÓN              #
+#===================================#
+
+# Tipos de correlación que aparecen en los resultados
+PEARSON = "Correlación de Pearson"
+INFORMACION_MUTUA = "Información mutua"
+INCOMPATIBLES = "incompatibles"
+
+
+# Función para calcular la matriz de correlaciones de Pearson entre un conjunto
+# de columnas numéricas. La media y la desviación de cada columna se calculan
+# una sola vez; después las columnas se estandarizan por bloques de filas y la
+# matriz se obtiene acumulando productos de matrices (BLAS), en lugar de
+# recorrer cada par de variables.
+# Parámetros:
+#   - columnas: lista de arrays numéricos de la misma longitud.
+# Output:
+#   - correlaciones: matriz (m x m) de correlaciones de Pearson. Las columnas
+#                    constantes tienen correlación 0 con el resto.
+
+def matriz_pearson(columnas):
+
+    num_columnas = len(columnas)
+    num_elementos = len(columnas[0]) if columnas else 0
+
+    if num_columnas == 0 or num_elementos == 0:
+        return np.zeros((num_columnas, num_columnas))
+
+    estadisticos = Estadisticos.desde_columnas(columnas)
+    desviacion = estadisticos.desviacion
+    inversa = np.divide(1.0, desviacion, out=np.zeros(num_columnas), where=desviacion != 0)
+
+    productos = np.zeros((num_columnas, num_columnas))
+    filas_por_bloque = max(1, _ELEMENTOS_POR_BLOQUE // num_columnas)
+
+    for inicio in range(0, num_elementos, filas_por_bloque):
+        bloque = np.column_stack([columna[inicio:inicio + filas_por_bloque] for columna in columnas]).astype(np.float64, copy=False)
+        bloque -= estadisticos.media
+        bloque *= inversa
+        productos += bloque.T @ bloque
+
+    correlaciones = productos / num_elementos
+    np.clip(correlaciones, -1, 1, out=correlaciones)
+    return correlaciones
+
+
+# Función para codificar una variable categórica como códigos enteros
+# 0..k-1 (uno por categoría distinta).
+# Parámetros:
+#   - columna: lista o array de valores categóricos.
+# Output:
+#   - codigos: array de enteros con el código de cada valor.
+#   - num_categorias: número de categorías distintas (k).
+
+def codificar_categorica(columna):
+
+    # Las columnas categóricas de un dataset s4 ya están codificadas
+    if isinstance(columna, s4.ColumnaCategorica):
+        return columna.codigos, len(columna.categorias)
+
+    columna = np.asarray(columna) if not isinstance(columna, np.ndarray) else columna
+
+    if columna.dtype.kind in "biuf":
+        categorias, codigos = np.unique(columna, return_inverse=True)
+        return codigos.reshape(-1), len(categorias)
+
+    # Para los valores categóricos se usa una tabla hash (valor -> código),
+    # más rápida que ordenar objetos y válida aunque los tipos no sean comparables
+    valores = columna.tolist()
+    tabla = {valor: codigo for codigo, valor in enumerate(dict.fromkeys(valores))}
+    codigos = np.fromiter(map(tabla.__getitem__, valores), dtype=np.int64, count=len(valores))
+    return codigos, len(tabla)
+
+
+# Función para contar las combinaciones de dos variables codificadas. Los
+# conteos conjuntos se obtienen con un único bincount sobre el código
+# combinado (x * k_y + y); si la tabla de contingencia completa fuese mucho
+# mayor que el número de datos se cuentan solo las combinaciones presentes.
+# Output:
+#   - conteos de las combinaciones presentes, con sus códigos x e y.
+
+def contar_conjunta(codigos_x, k_x, codigos_y, k_y):
+
+    combinados = codigos_x.astype(np.int64) * k_y + codigos_y
+
+    if k_x * k_y <= 4 * len(combinados) + 1024:
+        conteos = np.bincount(combinados, minlength=k_x * k_y)
+        presentes = np.flatnonzero(conteos)
+        conteos = conteos[presentes]
+    else:
+        presentes, conteos = np.unique(combinados, return_counts=True)
+
+    return conteos, presentes // k_y, presentes % k_y
+
+
+# Función para calcular la información mutua (en bits) entre dos variables
+# ya codificadas, a partir de sus códigos y sus conteos marginales.
+def informacion_mutua_codificada(codigos_x, marginal_x, codigos_y, marginal_y):
+
+    total = len(codigos_x)
+    conteos, x, y = contar_conjunta(codigos_x, len(marginal_x), codigos_y, len(marginal_y))
+    conteos_esperados = marginal_x[x] * marginal_y[y].astype(np.float64)
+
+    # I(X;Y) = sum p_xy * log2(p_xy / (p_x * p_y))
+    return float(np.sum(conteos / total * np.log2(conteos * total / conteos_esperados)))
+
+
+# Función para calcular la matriz de información mutua (en bits) entre un
+# conjunto de variables categóricas. Cada columna se codifica una sola vez
+# y sus frecuencias marginales se reutilizan en todos sus pares.
+# Parámetros:
+#   - columnas: lista de variables categóricas de la misma longitud.
+# Output:
+#   - info_mutua: matriz (m x m) de información mutua. La diagonal contiene
+#                 la entropía de cada variable.
+
+def matriz_informacion_mutua(columnas):
+
+    num_columnas = len(columnas)
+    info_mutua = np.zeros((num_columnas, num_columnas))
+
+    if num_columnas == 0 or len(columnas[0]) == 0:
+        return info_mutua
+
+    codificadas = [codificar_categorica(columna)[0] for columna in columnas]
+    marginales = [np.bincount(codigos) for codigos in codificadas]
+
+    for a in range(num_columnas):
+        for b in range(a, num_columnas):
+            valor = informacion_mutua_codificada(codificadas[a], marginales[a], codificadas[b], marginales[b])
+            info_mutua[a, b] = info_mutua[b, a] = valor
+
+    return info_mutua
+
+
+# Función para calcular la información mutua (en bits) entre
+# dos variables de categóricas
+def calcular_informacion_mutua(x, y):
+    return float(matriz_informacion_mutua([x, y])[0, 1])
+
+
+# Función para convertir una matriz de correlaciones en el diccionario de
+# resultados por pares de variables de calcular_correlacion.
+# Parámetros:
+#   - matriz: matriz (p x p) devuelta por calcular_correlacion(dataset, formato="matriz").
+#   - tipos: esquema del dataset (lista con el tipo de cada variable).
+# Output:
+#   - resultados: diccionario {"Var_i-Var_j": {"tipo": ..., "valor": ...}}.
+
+def correlacion_a_diccionario(matriz, tipos):
+
+    resultados = {}
+    num_variables = len(tipos)
+
+    for i in range(num_variables):
+        numerica_i = tipos[i] == s4.NUMERICA
+
+        for j in range(i + 1, num_variables):
+            numerica_j = tipos[j] == s4.NUMERICA
+
+            if numerica_i and numerica_j:
+                resultados[f"Var_{i+1}-Var_{j+1}"] = {"tipo": PEARSON, "valor": float(matriz[i, j])}
+
+            elif not(numerica_i) and not(numerica_j):
+                resultados[f"Var_{i+1}-Var_{j+1}"] = {"tipo": INFORMACION_MUTUA, "valor": float(matriz[i, j])}
+
+            else:
+                resultados[f"Var_{i+1}-Var_{j+1}"] = {"tipo": INCOMPATIBLES, "valor": "-"}
+
+    return resultados
+
+
+# Función para calcular la correlación de Pearson y la información mutua entre
+# pares de variables en un dataset.
+#   - numérica - numérica: Correlación de Pearson
+#   - categórica - categórica: Información mutua
+#   - numerica - categórica: Na
+# Parámetros:
+#   - dataset: un dataset del tipo s4
+#   - formato: "diccionario" (por defecto) o "matriz".
+# Output:
+#   - con formato="diccionario":
+#       resultados: diccionario que contiene la correlación para cada par de 
+#                   variables compatibles, donde cada clave es el par de variables
+#                   y el valor es otro diccionario con el tipo de correlación
+#                   y el valor calculado.
+#   - con formato="matriz":
+#       matriz: matriz densa (p x p) con la correlación de Pearson entre variables
+#               numéricas, la información mutua entre variables categóricas y
+#               np.nan para los pares incompatibles.
+#       variables: nombre de cada fila/columna de la matriz ("Var_1", "Var_2", ...).
+
+@perfil.instrumentar
+def calcular_correlacion(dataset, formato="diccionario"):
+
+    if formato not in ["diccionario", "matriz"]:
+        raise ValueError("Formato no válido. Formatos válidos: 'diccionario' o 'matriz'.")
+
+    num_variables = dataset.numero_variables
+    matriz = np.full((num_variables, num_variables), np.nan)
+
+    with perfil.etapa("esquema", columnas=num_variables):
+        numericas = [i for i in range(num_variables) if dataset.tipo(i) == s4.NUMERICA]
+        categoricas = [i for i in range(num_variables) if dataset.tipo(i) != s4.NUMERICA]
+
+    # numérica - numérica :: Pearson (todo el bloque a la vez)
+    if numericas:
+        with perfil.etapa("pearson", dataset.numero_individuos, len(numericas)):
+            matriz[np.ix_(numericas, numericas)] = matriz_pearson([dataset.columna(i) for i in numericas])
+
+    # categórica - categórica :: Info mutua (todo el bloque a la vez)
+    if categoricas:
+        with perfil.etapa("informacion_mutua", dataset.numero_individuos, len(categoricas)):
+            matriz[np.ix_(categoricas, categoricas)] = matriz_informacion_mutua([dataset.categorica(i) for i in categoricas])
+
+    # categórica - numérica :: incompatible (np.nan)
+    if formato == "matriz":
+        return matriz, [f"Var_{i+1}" for i in range(num_variables)]
+
+    with perfil.etapa("diccionario", columnas=num_variables):
+        return correlacion_a_diccionario(matriz, dataset.tipos)
+
+
+# Función para calcular la información mutua (en bits) a partir de una tabla
+# de contingencia (conteos de cada combinación de categorías).
+def informacion_mutua_tabla(tabla):
+
+    total = tabla.sum()
+
+    if total == 0:
+        return 0.0
+
+    x, y = np.nonzero(tabla)
+    conteos = tabla[x, y]
+    conteos_esperados = tabla.sum(axis=1)[x] * tabla.sum(axis=0)[y].astype(np.float64)
+
+    return float(np.sum(conteos / total * np.log2(conteos * total / conteos_esperados)))
+
+
+# Seguimiento incremental de la matriz de correlación de un dataset al que se
+# añaden individuos por lotes, sin volver a recorrer los lotes anteriores:
+#   - variables numéricas: número de individuos, media y matriz de co-momentos
+#     (suma de productos cruzados de las desviaciones respecto a la media). Los
+#     lotes se combinan con la fórmula de Chan et al., igual que Estadisticos,
+#     con un coste O(lote * p^2).
+#   - variables categóricas: tabla de contingencia de cada par de variables,
+#     con las categorías codificadas en el orden en que aparecen.
+# La matriz que se obtiene es la de calcular_correlacion sobre todos los
+# individuos acumulados (salvo errores de redondeo). Las tablas de contingencia
+# son densas, por lo que está pensado para variables categóricas con un número
+# moderado de categorías.
+# Métodos:
+#   - ajustar_parcial(lote): acumula un lote de individuos (dataset s4 o lista
+#                            de individuos) con las mismas variables.
+#   - ajustar(lote): descarta el estado anterior y ajusta sobre lote.
+#   - combinar(otro): une el estado de otro seguidor (por ejemplo, de otro proceso).
+#   - correlacion(formato="diccionario"): resultado con el formato de calcular_correlacion.
+
+class SeguidorCorrelacion:
+
+    def __init__(self):
+        self.numericas = None
+        self.categoricas = None
+        self.tipos = None
+        self.n = 0
+        self.media = None
+        self.comomentos = None
+        self.indices_categorias = None
+        self.contingencias = None
+
+    # Esquema del primer lote (o comprobación de que coincide con él)
+    def _comprobar_esquema(self, lote):
+
+        numericas = [i for i in range(lote.numero_variables) if lote.tipo(i) == s4.NUMERICA]
+        categoricas = [i for i in range(lote.numero_variables) if lote.tipo(i) != s4.NUMERICA]
+
+        if self.numericas is None:
+            self.numericas = numericas
+            self.categoricas = categoricas
+            self.media = np.zeros(len(numericas))
+            self.comomentos = np.zeros((len(numericas), len(numericas)))
+            self.indices_categorias = [{} for _ in categoricas]
+            self.contingencias = {(a, b): np.zeros((0, 0), dtype=np.int64) for a in range(len(categoricas)) for b in range(a, len(categoricas))}
+
+        elif numericas != self.numericas or categoricas != self.categoricas:
+            raise ValueError("Las variables numéricas y categóricas no coinciden con las del ajuste.")
+
+        self.tipos = list(lote.tipos)
+
+    # Combinación de la media y los co-momentos acumulados con los de un bloque
+    def _combinar_momentos(self, n, media, comomentos):
+
+        total = self.n + n
+        delta = media - self.media
+        self.comomentos += comomentos + np.outer(delta, delta) * (self.n * n / total)
+        self.media += delta * n / total
+
+    # Amplía la tabla de contingencia (a, b) si han aparecido categorías nuevas
+    def _tabla(self, a, b):
+
+        forma = (len(self.indices_categorias[a]), len(self.indices_categorias[b]))
+        tabla = self.contingencias[(a, b)]
+
+        if tabla.shape != forma:
+            ampliada = np.zeros(forma, dtype=np.int64)
+            ampliada[:tabla.shape[0], :tabla.shape[1]] = tabla
+            tabla = self.contingencias[(a, b)] = ampliada
+
+        return tabla
+
+    def ajustar_parcial(self, lote):
+
+        if not isinstance(lote, s4.S4Dataset):
+            lote = [list(individuo) for individuo in lote]
+
+            if not lote:
+                return self
+
+            lote = s4.S4Dataset(lote)
+
+        self._comprobar_esquema(lote)
+        n_lote = lote.numero_individuos
+
+        if n_lote == 0:
+            return self
+
+        # numérica - numérica :: media y co-momentos por bloques de filas
+        if self.numericas:
+            with perfil.etapa("pearson", n_lote, len(self.numericas)):
+                filas_por_bloque = max(1, _ELEMENTOS_POR_BLOQUE // len(self.numericas))
+
+                for inicio in range(0, n_lote, filas_por_bloque):
+                    bloque = np.column_stack([lote.columna(i)[inicio:inicio + filas_por_bloque] for i in self.numericas]).astype(np.float64, copy=False)
+                    media = bloque.mean(axis=0)
+                    bloque -= media
+                    self._combinar_momentos(len(bloque), media, bloque.T @ bloque)
+                    self.n += len(bloque)
+        else:
+            self.n += n_lote
+
+        # categórica - categórica :: tablas de contingencia
+        if self.categoricas:
+            with perfil.etapa("informacion_mutua", n_lote, len(self.categoricas)):
+
+                # Códigos del lote traducidos a los códigos acumulados de cada variable
+                codigos = []
+                for indice, i in zip(self.indices_categorias, self.categoricas):
+                    columna = lote.categorica(i)
+                    traduccion = np.array([indice.setdefault(categoria, len(indice)) for categoria in columna.categorias.tolist()], dtype=np.int64)
+                    codigos.append(traduccion[columna.codigos])
+
+                for (a, b) in self.contingencias:
+                    tabla = self._tabla(a, b)
+                    conteos, x, y = contar_conjunta(codigos[a], tabla.shape[0], codigos[b], tabla.shape[1])
+                    tabla[x, y] += conteos
+
+        return self
+
+    def ajustar(self, lote):
+        self.__init__()
+        return self.ajustar_parcial(lote)
+
+    def combinar(self, otro):
+
+        if otro.numericas is None:
+            return self
+
+        if self.numericas is None:
+            self.numericas, self.categoricas = otro.numericas, otro.categoricas
+            self.media = np.zeros(len(otro.numericas))
+            self.comomentos = np.zeros((len(otro.numericas), len(otro.numericas)))
+            self.indices_categorias = [{} for _ in otro.categoricas]
+            self.contingencias = {clave: np.zeros((0, 0), dtype=np.int64) for clave in otro.contingencias}
+
+        elif otro.numericas != self.numericas or otro.categoricas != self.categoricas:
+            raise ValueError("Las variables numéricas y categóricas no coinciden con las del ajuste.")
+
+        self.tipos = otro.tipos
+
+        if otro.n == 0:
+            return self
+
+        self._combinar_momentos(otro.n, otro.media, otro.comomentos)
+        self.n += otro.n
+
+        # Las categorías del otro seguidor se traducen a los códigos propios
+        traducciones = [np.array([indice.setdefault(categoria, len(indice)) for categoria in indice_otro], dtype=np.int64)
+                        for indice, indice_otro in zip(self.indices_categorias, otro.indices_categorias)]
+
+        for (a, b), tabla_otro in otro.contingencias.items():
+            self._tabla(a, b)[np.ix_(traducciones[a], traducciones[b])] += tabla_otro
+
+        return self
+
+    # Matriz de correlación de los individuos acumulados, con el formato de
+    # calcular_correlacion ("diccionario" o "matriz")
+    def correlacion(self, formato="diccionario"):
+
+        if formato not in ["diccionario", "matriz"]:
+            raise ValueError("Formato no válido. Formatos válidos: 'diccionario' o 'matriz'.")
+
+        if self.numericas is None:
+            raise ValueError("El seguidor debe ajustarse antes de calcular la correlación.")
+
+        num_variables = len(self.tipos)
+        matriz = np.full((num_variables, num_variables), np.nan)
+
+        # numérica - numérica :: Pearson a partir de los co-momentos
+        if self.numericas:
+            correlaciones = np.zeros((len(self.numericas), len(self.numericas)))
+
+            if self.n:
+                desviacion = np.sqrt(np.diag(self.comomentos) / self.n)
+                inversa = np.divide(1.0, desviacion, out=np.zeros(len(self.numericas)), where=desviacion != 0)
+                correlaciones = self.comomentos / self.n * np.outer(inversa, inversa)
+                np.clip(correlaciones, -1, 1, out=correlaciones)
+
+            matriz[np.ix_(self.numericas, self.numericas)] = correlaciones
+
+        # categórica - categórica :: Info mutua a partir de las tablas de contingencia
+        for (a, b), tabla in self.contingencias.items():
+            i, j = self.categoricas[a], self.categoricas[b]
+            matriz[i, j] = matriz[j, i] = informacion_mutua_tabla(tabla)
+
+        if formato == "matriz":
+            return matriz, [f"Var_{i+1}" for i in range(num_variables)]
+
+        return correlacion_a_diccionario(matriz, self.tipos)
+
+    def __repr__(self):
+        numericas = len(self.numericas) if self.numericas is not None else 0
+        categoricas = len(self.categoricas) if self.categoricas is not None else 0
+        return f"<SeguidorCorrelacion numericas={numericas}, categoricas={categoricas}, n={self.n}>"
+
+
+# Cálculo por teselas de la matriz de correlación / información mutua:
+# Para datasets muy anchos la matriz p x p se divide en teselas (bloques de
+# variables) que se calculan en paralelo en un conjunto de procesos. Las
+# columnas numéricas estandarizadas y los códigos de las categóricas se
+# colocan una sola vez en memoria compartida, de modo que cada proceso lee
+# directamente las columnas de su tesela sin copias ni serialización.
+
+# Datos compartidos de cada proceso trabajador (se rellenan al iniciarlo)
+_datos_teselas = {}
+
+
+# Crea un array de numpy (sin inicializar) en un bloque de memoria compartida
+# nuevo, para escribir en él directamente sin una copia privada intermedia.
+# Output:
+#   - array: array de numpy sobre el bloque.
+#   - descriptor: nombre del bloque, forma y dtype (para enlazarlo en los trabajadores).
+
+def _array_compartido(forma, dtype, bloques):
+
+    dtype = np.dtype(dtype)
+    memoria = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(forma)) * dtype.itemsize))
+    bloques.append(memoria)
+
+    array = np.ndarray(forma, dtype=dtype, buffer=memoria.buf, order='F')
+    return array, {"nombre": memoria.name, "forma": forma, "dtype": dtype.str}
+
+
+# Inicialización de cada proceso trabajador: se enlazan los bloques de
+# memoria compartida creados por el proceso principal.
+def _iniciar_trabajador_teselas(descriptor):
+
+    _datos_teselas.clear()
+    _datos_teselas["memoria"] = []
+
+    for clave, valor in descriptor.items():
+
+        if isinstance(valor, dict) and "nombre" in valor:
+            memoria = shared_memory.SharedMemory(name=valor["nombre"])
+            _datos_teselas["memoria"].append(memoria)
+            valor = np.ndarray(valor["forma"], dtype=np.dtype(valor["dtype"]), buffer=memoria.buf, order='F')
+
+        _datos_teselas[clave] = valor
+
+
+# Cálculo de una tesela (filas x columnas de la matriz de correlación) en
+# un proceso trabajador.
+def _calcular_tesela_trabajador(filas, columnas):
+    return filas, columnas, _calcular_tesela(_datos_teselas, filas, columnas)
+
+
+# Columnas estandarizadas de las variables numéricas en las posiciones
+# inicio..fin-1. En los trabajadores son vistas de "z" (memoria compartida);
+# en el propio proceso se calculan a partir de las columnas del dataset solo
+# para la tesela, sin construir la matriz estandarizada completa.
+def _z_tesela(datos, inicio, fin):
 
-    # Caso 1: Discretizar cada columna si 'dataset' 
-    # es una instancia de dataset s4
-    if isinstance(dataset, s4.S4Dataset):
+    if "z" in datos:
+        return datos["z"][:, inicio:fin]
 
-        columnas = list(zip(*dataset.data))  
-        dataset_discretizado = []
-        lista_intervalos = []
-        
-        # Se aplica la discretización por cada columna numerica
-        for columna in columnas:
-            
-            if es_numerica(columna):
-                datos_discretizados, intervalos = discretizar_unico(columna, num_intervalos)
-                dataset_discretizado.append(datos_discretizados)  
-                lista_intervalos.append(intervalos) 
-                
-            else:
-                # Si la columna no es numérica saltarla
-                dataset_discretizado.append(columna)
-                
-            
-        # Se revierte la transposición para devolver la estructura original
-        # y se convierte en un objeto s4 
-        dataset_discretizado = [list(elem) for elem in list(zip(*dataset_discretizado))]
-        
-        try:
-            dataset_discretizado = s4.S4Dataset(dataset_discretizado)
-        except (TypeError, ValueError, IndexError) as e:
-            print("Error:", e)
+    bloque = np.empty((datos["n"], fin - inicio), order='F')
 
-        return dataset_discretizado, lista_intervalos
+    for k in range(inicio, fin):
+        columna = bloque[:, k - inicio]
+        np.subtract(datos["dataset"].columna(datos["numericas"][k]), datos["media"][k], out=columna)
+        columna *= datos["inversa"][k]
 
-    # Caso 2: Discretizar directamente una lista de valores si no es S4Dataset
-    else:
-        return discretizar_unico(dataset, num_intervalos)
+    return bloque
 
 
+# Códigos de la variable categórica en la posición x (de "codigos" en los
+# trabajadores o directamente de la columna del dataset en el propio proceso)
+def _codigos_tesela(datos, x):
 
+    if "codigos" in datos:
+        return datos["codigos"][:, x]
 
+    return datos["dataset"].categorica(datos["categoricas"][x]).codigos
 
-# Discretización por Igual Frecuencia (Equal Frequency Binning):
-# Esta función divide los datos en intervalos que contienen aproximadamente la misma cantidad de 
-# individuos. En caso de pasar un dataset completo actua solo sobre las variables numéricas.
+
+# Cálculo de una tesela de la matriz de correlación.
 # Parámetros:
-#   - data: el dataset a discretizar. Puede ser una variable única o un dataset s4.
-#   - num_intervalos: número de intervalos en los cuales se dividen los datos.
+#   - datos: diccionario con las columnas estandarizadas ("z") o lo necesario
+#            para calcularlas ("dataset", "numericas", "media", "inversa"), los
+#            códigos categóricos ("codigos" o "dataset" y "categoricas"), sus
+#            "marginales" y la posición de cada variable en ellos
+#            ("posicion_numerica", "posicion_categorica").
+#   - filas, columnas: rangos (inicio, fin) de variables de la tesela.
 # Output:
-#   - discretized_data: lista de etiquetas de bin asignadas a cada valor en los datos. Es decir, un
-#                       individuo o un conjunto de ellos con valores categóricos
-#   - lista_intervalos: lista de tuplas que representan los límites de cada intervalo.
-#
-# Eejemplo:
-# si tienes 10 datos y deseas 2 intervalos, cada intervalo tendría 5 datos y,
-# independientemente del valor de los mismos
+#   - bloque: matriz con Pearson, información mutua o np.nan (incompatibles).
 
-def igual_frecuencia(dataset, num_intervalos):
+def _calcular_tesela(datos, filas, columnas):
 
-    # Subrutina para discretizar una lista de valores
-    # los outputs y los inputs son los mismos que los
-    # de la función en si.
-    def discretizar_unico(dataset, num_intervalos):
+    indices_filas = np.arange(*filas)
+    indices_columnas = np.arange(*columnas)
+    bloque = np.full((len(indices_filas), len(indices_columnas)), np.nan)
+
+    # numérica - numérica :: Pearson. Las variables numéricas de un rango
+    # ocupan posiciones consecutivas en "z", por lo que se usan vistas.
+    posicion = datos["posicion_numerica"]
+    numericas_filas = np.flatnonzero(posicion[indices_filas] >= 0)
+    numericas_columnas = np.flatnonzero(posicion[indices_columnas] >= 0)
+
+    if numericas_filas.size and numericas_columnas.size and datos["n"]:
+        rango_filas = (posicion[indices_filas[numericas_filas[0]]], posicion[indices_filas[numericas_filas[-1]]] + 1)
+        rango_columnas = (posicion[indices_columnas[numericas_columnas[0]]], posicion[indices_columnas[numericas_columnas[-1]]] + 1)
+        z_filas = _z_tesela(datos, *rango_filas)
+        z_columnas = z_filas if rango_columnas == rango_filas else _z_tesela(datos, *rango_columnas)
+        bloque[np.ix_(numericas_filas, numericas_columnas)] = np.clip(z_filas.T @ z_columnas / datos["n"], -1, 1)
+
+    # categórica - categórica :: Info mutua
+    posicion = datos["posicion_categorica"]
+    for a in np.flatnonzero(posicion[indices_filas] >= 0):
+        x = posicion[indices_filas[a]]
         
-        datos_ordenados = sorted(dataset)
-        num_elementos = len(dataset)
-        # Se calcula el tamaño de cada intervalo dividiendo el número de 
-        # elementos por el número de intervalos
-        tam_intervalo = num_elementos // num_intervalos
+        for b in np.flatnonzero(posicion[indices_columnas] >= 0):
+            y = posicion[indices_columnas[b]]
 
-        intervalos = []
-        datos_discretizados = [None] * num_elementos
+            if datos["n"]:
+                bloque[a, b] = informacion_mutua_codificada(_codigos_tesela(datos, x), datos["marginales"][x],
+                                                            _codigos_tesela(datos, y), datos["marginales"][y])
+            else:
+                bloque[a, b] = 0.0
 
-        for i in range(num_intervalos):
-            
-            # Se calculan los índices inferiores y superiores para el intervalo actual
-            indice_inferior = i * tam_intervalo
-            indice_superior = indice_inferior + tam_intervalo if i < num_intervalos - 1 else num_elementos
+    return bloque
 
-            # Determina los límites inferior y superior del intervalo
-            limite_inferior = datos_ordenados[indice_inferior]
-            limite_superior = datos_ordenados[indice_superior - 1] if indice_superior > indice_inferior else limite_inferior
-            
-            intervalos.append((limite_inferior, limite_superior))
 
-            for j in range(indice_inferior, indice_superior):
-                valor = datos_ordenados[j]
+# Función para calcular la matriz de correlación / información mutua por
+# teselas, devolviendo cada tesela en cuanto está terminada.
+# Parámetros:
+#   - dataset: un dataset del tipo s4.
+#   - tam_tesela: número de variables por lado de cada tesela. Si no se indica
+#                 se deduce de memoria_maxima (o se usan 512 variables).
+#   - num_procesos: número de procesos trabajadores. Con 1 (por defecto) las
+#                   teselas se calculan en el propio proceso.
+#   - memoria_maxima: memoria máxima aproximada (en bytes) para las teselas en
+#                     curso. Limita el tamaño de las teselas y cuántas se
+#                     calculan a la vez. No incluye las columnas de datos: en el
+#                     propio proceso se estandarizan solo las de cada tesela, y
+#                     con varios procesos las columnas estandarizadas (n x numéricas,
+#                     float64) y los códigos de las categóricas (n x categóricas,
+#                     int32) se escriben una sola vez en memoria compartida.
+# Output:
+#   - generador de tuplas ((inicio_filas, fin_filas), (inicio_columnas, fin_columnas), bloque)
+#     con las teselas del triángulo superior de la matriz (inicio_filas <= inicio_columnas).
+#     Los valores coinciden con los de calcular_correlacion(dataset, formato="matriz").
 
-                for indice, v in enumerate(dataset):
-                    if v == valor and datos_discretizados[indice] is None:
-                        datos_discretizados[indice] = f'Bin_{i+1}'
-                        break
+def iterar_teselas_correlacion(dataset, tam_tesela=None, num_procesos=1, memoria_maxima=None):
 
-        return datos_discretizados, intervalos
+    num_variables = dataset.numero_variables
+    num_procesos = max(1, num_procesos or os.cpu_count() or 1)
 
-    # Caso 1: Discretizar cada columna si 'dataset' 
-    # es una instancia de dataset s4    
-    if isinstance(dataset, s4.S4Dataset):
-        
-        columnas = list(zip(*dataset.data))
-        dataset_discretizado = []
-        lista_intervalos = []
-        
-        # Se aplica la discretización por cada columna
-        for columna in columnas:
-            if es_numerica(columna):
-                datos_discretizados, intervalos = discretizar_unico(columna, num_intervalos)
-                dataset_discretizado.append(datos_discretizados)
-                lista_intervalos.append(intervalos)
-            else:
-                # Si la columna no es numérica saltarla
-                dataset_discretizado.append(columna)
+    # Tamaño de tesela: cada proceso mantiene como mucho dos teselas en curso
+    if tam_tesela is None:
+        tam_tesela = 512 if memoria_maxima is None else int((memoria_maxima / (2 * num_procesos * 8)) ** 0.5)
 
-        # Se reestructura el dataset discretizado y se convierte en un objeto s4
-        dataset_discretizado = [list(elem) for elem in list(zip(*dataset_discretizado))]
+    tam_tesela = max(1, min(tam_tesela, max(1, num_variables)))
+    teselas = [((i, min(i + tam_tesela, num_variables)), (j, min(j + tam_tesela, num_variables)))
+               for i in range(0, num_variables, tam_tesela) for j in range(i, num_variables, tam_tesela)]
 
-        try:
-            dataset_discretizado = s4.S4Dataset(dataset_discretizado)
-        except (TypeError, ValueError, IndexError) as e:
-            print("Error:", e)
+    numericas = [i for i in range(num_variables) if dataset.tipo(i) == s4.NUMERICA]
+    categoricas = [i for i in range(num_variables) if dataset.tipo(i) != s4.NUMERICA]
+    n = dataset.numero_individuos
 
-        return dataset_discretizado, lista_intervalos
+    # Parámetros de la estandarización de las columnas numéricas
+    media = np.zeros(len(numericas))
+    inversa = np.zeros(len(numericas))
+    if numericas and n:
+        estadisticos = Estadisticos.desde_dataset(dataset, numericas)
+        desviacion = estadisticos.desviacion
+        media = estadisticos.media
+        inversa = np.divide(1.0, desviacion, out=np.zeros(len(numericas)), where=desviacion != 0)
 
-    # Caso 2: Discretizar directamente una lista de valores si no es S4Dataset    
-    else:
-        return discretizar_unico(dataset, num_intervalos)
+    marginales = [np.bincount(dataset.categorica(i).codigos) for i in categoricas]
 
+    posicion_numerica = np.full(num_variables, -1)
+    posicion_numerica[numericas] = np.arange(len(numericas))
+    posicion_categorica = np.full(num_variables, -1)
+    posicion_categorica[categoricas] = np.arange(len(categoricas))
 
+    datos = {"marginales": marginales, "n": n,
+             "posicion_numerica": posicion_numerica, "posicion_categorica": posicion_categorica}
 
+    # Cálculo en el propio proceso: las columnas se leen del dataset tesela a tesela
+    if num_procesos == 1:
+        datos.update(dataset=dataset, numericas=numericas, categoricas=categoricas, media=media, inversa=inversa)
 
-#===================================#
-#          NORMALIZACIÓN            #
-#===================================#
+        for filas, columnas in teselas:
+            yield filas, columnas, _calcular_tesela(datos, filas, columnas)
+        return
 
-# Función para normalizar las variables numéricas en un dataset o una variable única.
-# La normalización ajusta los valores de los datos a un rango entre 0 y 1.
-# Parámetros:
-#   - dataset: dataset a normalizar. Puede ser una variable numérica o un dataset tipo s4.
-# Output:
-#   - datos_transformados: variable numérica única o conjunto de datos con los valores 
-#                          normalizados para cada columna numérica.
+    # Cálculo en paralelo sobre memoria compartida: las columnas estandarizadas
+    # y los códigos se escriben directamente en los bloques compartidos. Se
+    # limita el número de teselas en curso para que la memoria no crezca con
+    # el tamaño de la matriz.
+    bloques = []
+    try:
+        z, datos["z"] = _array_compartido((n, len(numericas)), np.float64, bloques)
+        for k, i in enumerate(numericas):
+            np.subtract(dataset.columna(i), media[k], out=z[:, k])
+            z[:, k] *= inversa[k]
 
-def normalizar_dataset(dataset):
+        codigos, datos["codigos"] = _array_compartido((n, len(categoricas)), np.int32, bloques)
+        for k, i in enumerate(categoricas):
+            codigos[:, k] = dataset.categorica(i).codigos
 
-    # Caso 1: Si dataset es una variable única (lista de valores numéricos)
-    if isinstance(dataset, list) and es_numerica(dataset):
-        
-        min_val = min(dataset)
-        max_val = max(dataset)
-        rango = max_val - min_val
-        
-        # Evitar división por cero
-        if rango == 0:
-            return [0] * len(dataset)  
-        
-        else:
-            return [(x - min_val) / rango for x in dataset]
+        # Los arrays sobre los bloques deben liberarse antes de cerrarlos
+        del z, codigos
 
-    # Caso 2: Si el dataset es una instancia del tipo s4
-    datos_transformados = []
-    
-    for fila in dataset.data:
-        datos_transformados.append(fila[:])  
-    
-    # Normalizar cada columna por separado
-    num_columnas = dataset.numero_variables
-    
-    for col in range(num_columnas):
-        columna = []
-        
-        for fila in datos_transformados:
-            valor = fila[col]
-            
-            if isinstance(valor, (int, float)):
-                columna.append(valor)
-        
-        # Calcular mínimo, máximo y rango de la columna si tiene valores numéricos
-        if columna:
-            
-            min_val = min(columna)
-            max_val = max(columna)
-            rango = max_val - min_val
+        with concurrent.futures.ProcessPoolExecutor(max_workers=num_procesos, initializer=_iniciar_trabajador_teselas, initargs=(datos,)) as ejecutor:
             
-            for fila in datos_transformados:
-                
-                if isinstance(fila[col], (int, float)):    
-                    fila[col] = (fila[col] - min_val) / rango if rango != 0 else 0
+            pendientes = set()
+            teselas = iter(teselas)
 
-    # Se reestructura la salida como un objeto s4
-    try:
-        datos_transformados = s4.S4Dataset(datos_transformados)
-    except (TypeError, ValueError, IndexError) as e:
-        print("Error:", e)
+            for filas, columnas in teselas:
+                pendientes.add(ejecutor.submit(_calcular_tesela_trabajador, filas, columnas))
 
-    return datos_transformados
+                if len(pendientes) >= 2 * num_procesos:
+                    terminadas, pendientes = concurrent.futures.wait(pendientes, return_when=concurrent.futures.FIRST_COMPLETED)
+                    for tarea in terminadas:
+                        yield tarea.result()
 
+            for tarea in concurrent.futures.as_completed(pendientes):
+                yield tarea.result()
 
+    finally:
+        for memoria in bloques:
+            memoria.close()
+            memoria.unlink()
 
-#===================================#
-#        ESTANDARIZACIÓN            #
-#===================================#
 
-# Función para estandarizar las variables numéricas en un dataset o en una variable único.
-# La estandarización ajusta los valores de los datos de cada columna para que tengan una 
-# media de 0 y desviación estándar de 1.
+# Función para calcular la matriz completa de correlación / información mutua
+# por teselas (ver iterar_teselas_correlacion), escribiéndola en memoria o en
+# un fichero .npy en disco.
 # Parámetros:
-#   - dataset: datset a estandarizar. Puede ser una lista de valores numéricos o un dataset s4.
+#   - dataset, tam_tesela, num_procesos, memoria_maxima: ver iterar_teselas_correlacion.
+#   - ruta: fichero .npy donde guardar la matriz (se abre como np.memmap, de forma
+#           que la matriz no necesita caber en memoria). Si no se indica, la matriz
+#           se devuelve en memoria.
 # Output:
-#   - datos_transformados: conjunto de datos con los valores estandarizados para cada columna numérica.
+#   - matriz: matriz (p x p), igual que calcular_correlacion(dataset, formato="matriz").
+#   - variables: nombre de cada fila/columna de la matriz.
 
-def estandarizar_dataset(dataset):
+@perfil.instrumentar
+def calcular_correlacion_por_teselas(dataset, tam_tesela=None, num_procesos=1, memoria_maxima=None, ruta=None):
 
-    # Caso 1:  Si dataset es una variable único (lista de valores numéricos)
-    if isinstance(dataset, list) and es_numerica(dataset):
-        
-        media = sum(dataset) / len(dataset)
-        desviacion = (sum((x - media) ** 2 for x in dataset) / len(dataset)) ** 0.5
-        
-        # Evitar división por cero
-        if desviacion == 0:
-            return [0] * len(dataset)  
-        
-        else:
-            return [(x - media) / desviacion for x in dataset]
+    num_variables = dataset.numero_variables
+    forma = (num_variables, num_variables)
 
-    # Caso 2: Si dataset es un dataset s4 completo
-    datos_transformados = []
-    
-    for fila in dataset.data:
-        datos_transformados.append(fila[:])  
-    
-    # Estandarizar cada columna por separado
-    num_columnas = dataset.numero_variables
-    
-    for col in range(num_columnas):
-        columna = []
-    
-        for fila in datos_transformados:
-            valor = fila[col]
-    
-            if isinstance(valor, (int, float)):
-                columna.append(valor)
-        
-        # Calcular media y desviación estándar si
-        # los valores de la columna son numéricos
-        if columna:
-            media = sum(columna) / len(columna)
-            desviacion = (sum((x - media) ** 2 for x in columna) / len(columna)) ** 0.5
-    
-            for fila in datos_transformados:
-    
-                if isinstance(fila[col], (int, float)):
-                    fila[col] = (fila[col] - media) / desviacion if desviacion != 0 else 0
+    if ruta is None:
+        matriz = np.full(forma, np.nan)
+    else:
+        matriz = np.lib.format.open_memmap(ruta, mode='w+', dtype=np.float64, shape=forma)
 
-    # Se reestructura la salida como un objeto s4
-    try:
-        datos_transformados = s4.S4Dataset(datos_transformados)
-    except (TypeError, ValueError, IndexError) as e:
-        print("Error:", e)
+    for (inicio_filas, fin_filas), (inicio_columnas, fin_columnas), bloque in iterar_teselas_correlacion(dataset, tam_tesela, num_procesos, memoria_maxima):
+        matriz[inicio_filas:fin_filas, inicio_columnas:fin_columnas] = bloque
+        matriz[inicio_columnas:fin_columnas, inicio_filas:fin_filas] = bloque.T
 
-    return datos_transformados
+    if ruta is not None:
+        matriz.flush()
 
+    return matriz, [f"Var_{i+1}" for i in range(num_variables)]
 
 
-#===================================#
-#          CORRELACIÓN              #
-#===================================#
+# Tipo de los resultados de buscar_pares_correlacionados: un registro
+# compacto (i, j, valor) por par de variables.
+DTYPE_PARES = np.dtype([("i", np.int64), ("j", np.int64), ("valor", np.float64)])
 
-# Función para calcular la correlación de Pearson y la información mutua entre
-# pares de variables en un dataset.
-#   - numérica - numérica: Correlación de Pearson
-#   - categórica - categórica: Información mutua
-#   - numerica - categórica: Na
+
+# Función para buscar los pares de variables más correlacionados sin
+# construir el resultado de todos los pares. La matriz se calcula por
+# teselas (ver iterar_teselas_correlacion) y de cada tesela solo se guardan
+# los pares que cumplen el criterio, por lo que la memoria depende del
+# número de resultados y no de p².
 # Parámetros:
-#   - dataset: un dataset del tipo s4
+#   - dataset: un dataset del tipo s4.
+#   - umbral: si se indica, solo se conservan los pares con |valor| >= umbral.
+#   - top_k: si se indica, para cada variable se conservan sus top_k pares con
+#            mayor |valor| (cada par puede aparecer desde las dos variables).
+#   - tam_tesela, num_procesos, memoria_maxima: ver iterar_teselas_correlacion.
 # Output:
-#   - resultados: diccionario que contiene la correlación para cada par de 
-#                 variables compatibles, donde cada clave es el par de variables
-#                 y el valor es otro diccionario con el tipo de correlación
-#                 y el valor calculado.
+#   - pares: array estructurado con campos "i", "j" (índices de las variables,
+#            empezando en 0) y "valor" (Pearson o información mutua). Los pares
+#            incompatibles nunca se incluyen.
 
-def calcular_correlacion(dataset):
+@perfil.instrumentar
+def buscar_pares_correlacionados(dataset, umbral=None, top_k=None, tam_tesela=None, num_procesos=1, memoria_maxima=None):
 
-    # Función para calcular la correlación de Pearson
-    # entre dos variables numéricas.
-    def calcular_pearson(x, y):
-        
-        n = len(x)
-        
-        media_x = sum(x) / n
-        media_y = sum(y) / n
-        var_x   = sum((xi - media_x) ** 2 for xi in x) / n
-        var_y   = sum((yi - media_y) ** 2 for yi in y) / n
-        cov_xy  = sum((xi - media_x) * (yi - media_y) for xi, yi in zip(x, y)) / n
-        
-        return cov_xy / ((var_x * var_y) ** 0.5) if var_x and var_y else 0
+    if umbral is None and top_k is None:
+        raise ValueError("Hay que indicar un umbral, un top_k o ambos.")
 
-    # FUnción para calcular la información mutua entre
-    # dos variables de categóricas
-    def calcular_informacion_mutua(x, y):
-        
-        # Para calcular la frecuencia aprovecharemos
-        # la librería collections
-        total = len(x)
-        freq_x  = collections.Counter(x)
-        freq_y  = collections.Counter(y)
-        freq_xy = collections.Counter(zip(x, y))
-        
-        info_mutua = 0
-        
-        for (xi, yi), count_xy in freq_xy.items():
-            p_xy = count_xy / total
-            p_x = freq_x[xi] / total
-            p_y = freq_y[yi] / total
-            info_mutua += p_xy * math.log(p_xy / (p_x * p_y), 2)
-        
-        return info_mutua
+    num_variables = dataset.numero_variables
+    encontrados = []
 
-    # Se caclulan los resultados para cada par
-    # de variables compatibles:
-    # numérica - numérica :: Pearson
-    # categórica - numérica :: incompatible
-    # categórica - categórica :: Info mutua
-    resultados = {}
-    
-    for i in range(dataset.numero_variables):
-        
-        for j in range(i + 1, dataset.numero_variables):
-            var_i = [row[i] for row in dataset.data]
-            var_j = [row[j] for row in dataset.data]
+    # Mejores top_k valores (y sus variables) de cada variable hasta el momento
+    if top_k is not None:
+        mejores_valores = np.full((num_variables, top_k), np.nan)
+        mejores_indices = np.full((num_variables, top_k), -1)
 
-            if es_numerica(var_i) and es_numerica(var_j):
-                correlacion = calcular_pearson(var_i, var_j)
-                tipo = "Correlación de Pearson"
-                resultados[f"Var_{i+1}-Var_{j+1}"] = {"tipo": tipo, "valor": correlacion}
+    # Actualiza los mejores pares de las variables 'filas' con los valores
+    # de un bloque cuyas columnas son las variables 'columnas'
+    def actualizar_mejores(filas, columnas, bloque):
 
-            elif not(es_numerica(var_i)) and not(es_numerica(var_j)):
-                correlacion = calcular_informacion_mutua(var_i, var_j)
-                tipo = "Información mutua"
-                resultados[f"Var_{i+1}-Var_{j+1}"] = {"tipo": tipo, "valor": correlacion}
+        valores = np.concatenate([mejores_valores[filas], bloque], axis=1)
+        indices = np.concatenate([mejores_indices[filas], np.broadcast_to(columnas, bloque.shape)], axis=1)
 
-            else:
-                resultados[f"Var_{i+1}-Var_{j+1}"] = {"tipo": "incompatibles", "valor": "-"}
+        puntuacion = np.where(np.isnan(valores), -np.inf, np.abs(valores))
+        seleccion = np.argsort(-puntuacion, axis=1, kind='stable')[:, :top_k]
 
-    return resultados
+        mejores_valores[filas] = np.take_along_axis(valores, seleccion, axis=1)
+        mejores_indices[filas] = np.take_along_axis(indices, seleccion, axis=1)
+
+    for (inicio_filas, fin_filas), (inicio_columnas, fin_columnas), bloque in iterar_teselas_correlacion(dataset, tam_tesela, num_procesos, memoria_maxima):
+
+        filas = np.arange(inicio_filas, fin_filas)
+        columnas = np.arange(inicio_columnas, fin_columnas)
+
+        # Se descartan la diagonal (y su simétrico en las teselas diagonales),
+        # los pares incompatibles y los que no llegan al umbral
+        validos = ~np.isnan(bloque) & (filas[:, None] != columnas[None, :])
+        if umbral is not None:
+            validos &= np.abs(np.nan_to_num(bloque)) >= umbral
+
+        bloque = np.where(validos, bloque, np.nan)
+
+        if top_k is not None:
+            actualizar_mejores(filas, columnas, bloque)
+            if inicio_filas != inicio_columnas:
+                actualizar_mejores(columnas, filas, bloque.T)
+
+        else:
+            a, b = np.nonzero(validos & (filas[:, None] < columnas[None, :]))
+            pares = np.empty(len(a), dtype=DTYPE_PARES)
+            pares["i"], pares["j"], pares["valor"] = filas[a], columnas[b], bloque[a, b]
+            encontrados.append(pares)
+
+    if top_k is not None:
+        a, b = np.nonzero(mejores_indices >= 0)
+        pares = np.empty(len(a), dtype=DTYPE_PARES)
+        pares["i"], pares["j"], pares["valor"] = a, mejores_indices[a, b], mejores_valores[a, b]
+        return pares
+
+    pares = np.concatenate(encontrados) if encontrados else np.empty(0, dtype=DTYPE_PARES)
+    return np.sort(pares, order=["i", "j"])
 
 
 
@@ -415,9 +1717,92 @@ def calcular_correlacion(dataset):
 #   - varianza: valor de la varianza calculada para la lista de entrada.
 
 def calcular_varianza(columna):
-    media = sum(columna) / len(columna)
-    varianza = sum((x - media) ** 2 for x in columna) / len(columna)
-    return varianza
+
+    if len(columna) == 0:
+        return float("nan")
+
+    _, m2, _, _ = _momentos_columna(columna)
+    return float(m2 / len(columna))
+
+
+# Función para codificar la clase binaria una sola vez como un array booleano
+# (True = positivo). Por convención las clases se guardan como strings ('0'/'1'),
+# así que cada valor distinto se convierte con int() una única vez.
+# Parámetros:
+#   - clase: lista o array con la clase de cada individuo.
+# Output:
+#   - positivos: array booleano con True en los individuos de la clase 1.
+
+def codificar_clase(clase):
+
+    if isinstance(clase, np.ndarray) and clase.dtype.kind in "biuf":
+        return clase == 1
+
+    # Clase categórica codificada: se convierte solo la tabla de categorías
+    if isinstance(clase, s4.ColumnaCategorica):
+        tabla = np.array([int(valor) == 1 for valor in clase.categorias.tolist()], dtype=bool)
+        return tabla[clase.codigos]
+
+    valores = clase.tolist() if isinstance(clase, np.ndarray) else list(clase)
+    tabla = {valor: int(valor) == 1 for valor in set(valores)}
+    return np.fromiter(map(tabla.__getitem__, valores), dtype=bool, count=len(valores))
+
+
+# Función para calcular el rango medio (empezando en 1) de cada valor ya
+# ordenado por columnas. Los valores empatados reciben la media de los rangos
+# que ocupan, de modo que el resultado no depende del orden de entrada.
+def rangos_medios(ordenados):
+
+    n = ordenados.shape[0]
+    posiciones = np.arange(n)[:, None]
+
+    # Inicio y final del grupo de empates al que pertenece cada posición
+    inicio = np.ones(ordenados.shape, dtype=bool)
+    inicio[1:] = ordenados[1:] != ordenados[:-1]
+    final = np.ones(ordenados.shape, dtype=bool)
+    final[:-1] = inicio[1:]
+
+    primero = np.maximum.accumulate(np.where(inicio, posiciones, 0), axis=0)
+    ultimo = np.minimum.accumulate(np.where(final, posiciones, n - 1)[::-1], axis=0)[::-1]
+
+    return (primero + ultimo) / 2 + 1
+
+
+# Función para calcular el AUC de varias variables continuas a la vez en
+# relación a una clase binaria. La clase se codifica una sola vez y para
+# cada bloque de columnas se ordena con un único argsort; la suma de rangos
+# de los positivos usa rangos medios, por lo que los empates se tratan de
+# forma correcta (cada empate positivo-negativo cuenta 1/2).
+# Parámetros:
+#   - clase: lista o array que representa la clase de cada individuo.
+#   - columnas: lista de columnas numéricas a evaluar.
+# Output:
+#   - aucs: array con el AUC de cada columna (NaN si la clase no tiene
+#           positivos o negativos).
+
+@perfil.instrumentar
+def calcular_auc_columnas(clase, columnas):
+
+    positivos = codificar_clase(clase)
+    num_positivos = int(positivos.sum())
+    num_negativos = len(positivos) - num_positivos
+
+    aucs = np.full(len(columnas), np.nan)
+    if num_positivos == 0 or num_negativos == 0 or not columnas:
+        return aucs
+
+    paso = max(1, _ELEMENTOS_POR_BLOQUE // max(len(positivos), 1))
+
+    for inicio in range(0, len(columnas), paso):
+        bloque = np.column_stack([np.asarray(columna, dtype=np.float64) for columna in columnas[inicio:inicio + paso]])
+
+        orden = np.argsort(bloque, axis=0, kind='stable')
+        rangos = rangos_medios(np.take_along_axis(bloque, orden, axis=0))
+        suma_rangos = (rangos * positivos[orden]).sum(axis=0)
+
+        aucs[inicio:inicio + paso] = (suma_rangos - num_positivos * (num_positivos + 1) / 2) / (num_positivos * num_negativos)
+
+    return aucs
 
 
 # Función para calcular el AUC (Área bajo la curva ROC) para una variable 
@@ -429,50 +1814,253 @@ def calcular_varianza(columna):
 #   - auc: valor del AUC calculado para la variable continua.
 
 def calcular_auc(clase, columna):
-    
-    # Por convención en mi s4 se pasarán las clases categóricas
-    # y binarias como strings.
-    clase = [int(c) for c in clase]
-    
-    # 1- Convertir los datos en pares (valor, etiqueta)
-    # 2- Contar el número de positivos y negativos
-    # 3- Calcular AUC usando la fórmula de suma de rangos
-    
-    pares = list(zip(columna, clase))
-    pares.sort(key=lambda x: x[0])
+    return float(calcular_auc_columnas(clase, [columna])[0])
+
+
+# Sketch para el cálculo aproximado del AUC sobre datos que no caben en memoria.
+# Para cada columna se guarda un histograma de los positivos y otro de los
+# negativos sobre num_buckets intervalos de igual anchura, que se rellenan lote
+# a lote en una única pasada. Los histogramas de distintos procesos se suman con
+# combinar (siempre que usen los mismos límites).
+# A partir de los histogramas, los pares positivo-negativo de intervalos
+# distintos se cuentan de forma exacta y los del mismo intervalo se cuentan
+# como 1/2, por lo que el error del AUC aproximado está acotado por
+#       cota = 1/2 * sum_b(P_b * N_b) / (P * N)
+# siendo P_b y N_b los positivos y negativos del intervalo b. La cota se calcula
+# con los propios histogramas (cota_error) y, como sum_b(P_b * N_b) <= P * max_b(N_b),
+# nunca es mayor que la mitad de la fracción de negativos del intervalo más
+# poblado: al doblar num_buckets se reduce aproximadamente a la mitad para
+# variables continuas.
+# Parámetros:
+#   - num_buckets: número de intervalos de cada histograma.
+#   - minimos, maximos: límites de los intervalos de cada columna (escalares o
+#                       arrays). Si no se indican se toman del primer lote; los
+#                       valores fuera de los límites se acumulan en los intervalos
+#                       de los extremos (la cota sigue siendo válida, pero crece
+#                       tanto como los intervalos de los extremos). Tomarlos del
+#                       primer lote solo es seguro si ese lote es representativo
+#                       de todos los datos (no, por ejemplo, si están ordenados);
+#                       si se conocen, conviene indicar los límites exactos.
+# Métodos:
+#   - ajustar_parcial(clase, columnas): acumula un lote de individuos.
+#   - combinar(otro): suma al propio sketch los histogramas de otro con los
+#                     mismos límites (devuelve el propio sketch).
+#   - auc(): array con el AUC aproximado de cada columna.
+#   - cota_error(): array con la cota del error absoluto de cada AUC.
+
+class HistogramaAUC:
+
+    def __init__(self, num_buckets=256, minimos=None, maximos=None):
+
+        if (minimos is None) != (maximos is None):
+            raise ValueError("Hay que indicar tanto los mínimos como los máximos, o ninguno de los dos.")
+
+        self.num_buckets = num_buckets
+        self.minimos = minimos
+        self.maximos = maximos
+        self.positivos = None
+        self.negativos = None
+
+    def ajustar_parcial(self, clase, columnas):
+
+        positivos = codificar_clase(clase)
+        bloque = np.column_stack([np.asarray(columna, dtype=np.float64) for columna in columnas])
+        num_columnas = bloque.shape[1]
+
+        if self.positivos is None:
+
+            if self.minimos is None:
+                self.minimos = np.nanmin(bloque, axis=0)
+                self.maximos = np.nanmax(bloque, axis=0)
+
+            self.minimos = np.broadcast_to(np.asarray(self.minimos, dtype=np.float64), (num_columnas,)).copy()
+            self.maximos = np.broadcast_to(np.asarray(self.maximos, dtype=np.float64), (num_columnas,)).copy()
+            self.positivos = np.zeros((num_columnas, self.num_buckets), dtype=np.int64)
+            self.negativos = np.zeros((num_columnas, self.num_buckets), dtype=np.int64)
+
+        elif num_columnas != self.positivos.shape[0]:
+            raise ValueError(f"El sketch se ajustó sobre {self.positivos.shape[0]} columnas y el lote tiene {num_columnas}.")
+
+        # Intervalo de cada valor. Los NaN no se cuentan.
+        anchura = self.maximos - self.minimos
+        escala = np.divide(self.num_buckets, anchura, out=np.zeros_like(anchura), where=anchura > 0)
+        validos = ~np.isnan(bloque)
+
+        intervalos = np.clip(np.nan_to_num(np.floor((bloque - self.minimos) * escala)), 0, self.num_buckets - 1).astype(np.int64)
+        intervalos += np.arange(num_columnas) * self.num_buckets
+
+        tamaño = num_columnas * self.num_buckets
+        self.positivos += np.bincount(intervalos[validos & positivos[:, None]], minlength=tamaño).reshape(num_columnas, -1)
+        self.negativos += np.bincount(intervalos[validos & ~positivos[:, None]], minlength=tamaño).reshape(num_columnas, -1)
+
+        return self
+
+    def combinar(self, otro):
+
+        if otro.positivos is None:
+            return self
+
+        if self.positivos is None:
+            self.num_buckets = otro.num_buckets
+            self.minimos = otro.minimos.copy()
+            self.maximos = otro.maximos.copy()
+            self.positivos = otro.positivos.copy()
+            self.negativos = otro.negativos.copy()
+            return self
+
+        if (self.num_buckets != otro.num_buckets
+                or not np.array_equal(self.minimos, otro.minimos)
+                or not np.array_equal(self.maximos, otro.maximos)):
+            raise ValueError("Solo se pueden combinar sketches con los mismos intervalos.")
+
+        self.positivos += otro.positivos
+        self.negativos += otro.negativos
+        return self
+
+    # Número de pares positivo-negativo de cada columna
+    def _pares(self):
+
+        num_pares = self.positivos.sum(axis=1).astype(np.float64) * self.negativos.sum(axis=1)
+        return np.where(num_pares > 0, num_pares, np.nan)
 
-    positivos = sum(clase)  
-    negativos = len(clase) - positivos  
+    def auc(self):
 
-    rank_sum = 0
-    for rank, (valor, etiqueta) in enumerate(pares):
-        if etiqueta == 1:  
-            rank_sum += rank + 1 
+        if self.positivos is None:
+            return np.empty(0)
 
-    auc = (rank_sum - positivos * (positivos + 1) / 2) / (positivos * negativos)
-    return auc
+        # Negativos en los intervalos estrictamente inferiores a cada intervalo
+        negativos_inferiores = np.cumsum(self.negativos, axis=1) - self.negativos
+        aciertos = (self.positivos * negativos_inferiores.astype(np.float64)).sum(axis=1)
+        empates = (self.positivos * self.negativos.astype(np.float64)).sum(axis=1)
+
+        return (aciertos + empates / 2) / self._pares()
+
+    def cota_error(self):
+
+        if self.positivos is None:
+            return np.empty(0)
+
+        empates = (self.positivos * self.negativos.astype(np.float64)).sum(axis=1)
+        return empates / 2 / self._pares()
+
+    def __repr__(self):
+        columnas = 0 if self.positivos is None else self.positivos.shape[0]
+        return f"<HistogramaAUC num_buckets={self.num_buckets}, columnas={columnas}>"
+
+
+# Función para calcular el AUC aproximado de varias columnas en una única
+# pasada sobre un flujo de lotes (por ejemplo, trozos de un fichero), sin
+# tener nunca todos los datos en memoria.
+# Parámetros:
+#   - lotes: iterable de pares (clase, columnas) con la clase y las columnas
+#            numéricas de cada lote (siempre las mismas columnas).
+#   - num_buckets, minimos, maximos: ver HistogramaAUC.
+# Output:
+#   - aucs: array con el AUC aproximado de cada columna.
+#   - cotas: array con la cota del error absoluto de cada AUC.
+
+@perfil.instrumentar
+def calcular_auc_aproximado(lotes, num_buckets=256, minimos=None, maximos=None):
+
+    histograma = HistogramaAUC(num_buckets, minimos, maximos)
+
+    for clase, columnas in lotes:
+        histograma.ajustar_parcial(clase, columnas)
+
+    return histograma.auc(), histograma.cota_error()
+
+
+# Lotes de filas (clase, columnas) de un dataset s4 ya cargado, del tamaño
+# adecuado para no superar _ELEMENTOS_POR_BLOQUE valores por lote.
+def _lotes_dataset(dataset, variable_clase, indices):
+
+    clase = codificar_clase(columna_codificada(dataset, variable_clase))
+    columnas = [dataset.columna(i) for i in indices]
+    paso = max(1, _ELEMENTOS_POR_BLOQUE // max(len(indices), 1))
+
+    for inicio in range(0, dataset.numero_individuos, paso):
+        yield clase[inicio:inicio + paso], [columna[inicio:inicio + paso] for columna in columnas]
 
 
 # Función para calcular la entropía de una columna discreta.
 # La entropía mide la incertidumbre o el desorden en los valores de la columna.
+# Se calcula a partir del número de apariciones de cada código; en las columnas
+# categóricas de un dataset s4 esos conteos ya están calculados.
 # Parámetros:
-#   - columna: lista de valores discretos de una columna a evaluar.
+#   - columna: lista de valores discretos de una columna a evaluar (o ColumnaCategorica).
 # Output:
 #   - entropia: valor de la entropía calculada para la columna.
 
 def calcular_entropia(columna):
-    
-    contador = collections.Counter(columna)
-    total = sum(contador.values())
-    entropia = 0
-    
-    for count in contador.values():
-        probabilidad = count / total 
-        
-        if probabilidad > 0:
-            entropia -= probabilidad * (math.log(probabilidad) / math.log(2))  
-    
-    return entropia
+
+    if isinstance(columna, s4.ColumnaCategorica):
+        return entropia_conteos(columna.conteos)
+
+    return entropia_conteos(np.bincount(codificar_categorica(columna)[0]))
+
+
+# Entropía (en bits) a partir del número de apariciones de cada valor
+def entropia_conteos(conteos):
+
+    conteos = conteos[conteos > 0]
+    if conteos.size == 0:
+        return 0
+
+    probabilidades = conteos / conteos.sum()
+    return float(-np.sum(probabilidades * np.log2(probabilidades)))
+
+
+# Resumen de un dataset s4 calculado en una única lectura de los datos:
+# los estadísticos suficientes (Estadisticos) de las variables numéricas, que
+# recorren cada columna una sola vez por bloques de filas, y los conteos de las
+# categóricas, que cada ColumnaCategorica ya mantiene. De él se obtienen la
+# varianza, la entropía, los parámetros de los escaladores y los intervalos de
+# igual anchura sin volver a recorrer las columnas.
+# Atributos:
+#   - numericas: índices de las variables numéricas.
+#   - estadisticos: Estadisticos de las variables numéricas (en ese orden).
+#   - conteos: diccionario índice -> conteos de cada variable categórica.
+# Métodos:
+#   - varianza(index) / entropia(index): métrica de una variable.
+#   - escalador(clase=EscaladorMinMax): escalador ya ajustado.
+#   - discretizador_igual_anchura(num_intervalos): discretizador ya ajustado.
+
+class ResumenDataset:
+
+    def __init__(self, dataset):
+
+        self.numericas = [i for i in range(dataset.numero_variables) if dataset.tipo(i) == s4.NUMERICA]
+        self.estadisticos = Estadisticos.desde_dataset(dataset, self.numericas)
+        self.conteos = {i: dataset.categorica(i).conteos.copy() for i in range(dataset.numero_variables) if dataset.tipo(i) != s4.NUMERICA}
+        self._posiciones = {i: k for k, i in enumerate(self.numericas)}
+
+    def varianza(self, index):
+        return float(self.estadisticos.varianza[self._posiciones[index]])
+
+    def entropia(self, index):
+        return entropia_conteos(self.conteos[index])
+
+    def escalador(self, clase=EscaladorMinMax):
+        return clase.desde_estadisticos(self.numericas, self.estadisticos)
+
+    def discretizador_igual_anchura(self, num_intervalos):
+        return DiscretizadorIgualAnchura.desde_estadisticos(num_intervalos, self.numericas, self.estadisticos)
+
+    def __repr__(self):
+        return f"<ResumenDataset numericas={len(self.numericas)}, categoricas={len(self.conteos)}>"
+
+
+# AUC de las variables numéricas indicadas de un dataset s4 respecto a la
+# variable clase (ya codificada con columna_codificada). Cada valor se guarda
+# en el caché del dataset junto con la versión de la clase, de forma que solo
+# se calcula el AUC de las columnas (o de la clase) que han cambiado, y el de
+# todas ellas en una sola llamada a calcular_auc_columnas.
+def _aucs_dataset(dataset, variable_clase, clase, numericas):
+
+    nombre = ("auc", dataset.version(variable_clase))
+    calcular = lambda columnas: calcular_auc_columnas(clase, columnas).tolist()
+
+    return dataset.estadisticos(numericas, nombre, calcular)
 
 
 # Función para calcular la varianza, AUC y entropía para cada variable en un dataset.
@@ -482,32 +2070,45 @@ def calcular_entropia(columna):
 #   - dataset: dataset del tipo s4.
 #   - variable_clase: índice de la variable clase en el dataset (opcional).
 #   - supervisado: booleano que indica si el dataset es supervisado o no
+#   - resumen: ResumenDataset ya calculado del dataset (opcional). Si no se
+#              indica, se calcula en una única pasada sobre los datos.
 # Output:
 #   - resultados: diccionario que contiene las métricas calculadas (Varianza, AUC, Entropía)
 #                 para cada variable según su tipo.
 
-def calcular_metricas(dataset, variable_clase=None, supervisado=False):
+@perfil.instrumentar
+def calcular_metricas(dataset, variable_clase=None, supervisado=False, resumen=None):
     
-    # Transponer los datos para acceder a las columnas fácilmente
-    variables = list(zip(*dataset.data))
     resultados = {}
 
-    # Extraer la variable clase como una lista si hace falta
-    clase = [row[variable_clase] for row in dataset.data] if supervisado else None 
+    if resumen is None:
+        with perfil.etapa("estadisticos", dataset.numero_individuos, dataset.numero_variables):
+            resumen = ResumenDataset(dataset)
+
+    # Extraer la variable clase si hace falta
+    clase = columna_codificada(dataset, variable_clase) if supervisado else None 
+    clase_binaria = supervisado and es_clase_binaria(dataset, variable_clase)
 
-    for i, columna in enumerate(variables):
+    # El AUC de todas las variables numéricas se calcula en una sola llamada
+    numericas = [i for i in range(dataset.numero_variables) if i != variable_clase and dataset.tipo(i) == s4.NUMERICA]
+    aucs = {}
+    if clase_binaria:
+        with perfil.etapa("auc", dataset.numero_individuos, len(numericas)):
+            aucs = dict(zip(numericas, _aucs_dataset(dataset, variable_clase, clase, numericas)))
+
+    for i in range(dataset.numero_variables):
         
         # Saltar la variable clase
         if i == variable_clase:
             continue  
         
-        if es_numerica(columna):
-            varianza = calcular_varianza(columna)
-            auc = calcular_auc(clase, columna) if supervisado and len(set(clase)) == 2 else None
+        if dataset.tipo(i) == s4.NUMERICA:
+            varianza = resumen.varianza(i)
+            auc = aucs.get(i)
             resultados[f'Variable_{i}'] = {'Varianza': varianza, 'AUC': auc}
         
         else:
-            entropia = calcular_entropia(columna)
+            entropia = resumen.entropia(i)
             resultados[f'Variable_{i}'] = {'Entropía': entropia}
 
     return resultados
@@ -525,8 +2126,12 @@ def calcular_metricas(dataset, variable_clase=None, supervisado=False):
 # Output:
 #   - 
 
+@perfil.instrumentar
 def plot_auc(resultados):
 
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
     variables  = []
     auc_values = []
 
@@ -559,8 +2164,13 @@ def plot_auc(resultados):
 # Output:
 #   -
 
+@perfil.instrumentar
 def plot_matriz_correlacion(correlaciones):
 
+    import matplotlib.pyplot as plt
+    import pandas as pd
+    import seaborn as sns
+
     # Obtención de la matriz de correlaciones partiendo 
     # del objeto correlaciones.
     #   - Buscar las n variables Ddividiendo los nombres "var_i-var_j"
@@ -614,10 +2224,22 @@ def plot_matriz_correlacion(correlaciones):
 #             una columna para ser filtrada o no
 #   - supervisado: booleano que indíca si un dataset es supervisado o no
 #   - variable_clase: el índice de la variable que funciona como clase en los datasets supervisados
+#   - aproximado: si es True el AUC se aproxima con HistogramaAUC en una pasada por lotes
+#                 en lugar de ordenar cada columna completa (con el mínimo y el máximo
+#                 exactos de cada columna como límites). Las columnas cuyo AUC aproximado
+#                 está a menos de la cota del error del umbral se calculan de forma exacta.
+#   - num_buckets: número de intervalos de los histogramas del AUC aproximado
+#   - modo: qué hacer con el resultado del filtro
+#       - "eliminar": se eliminan del propio dataset las variables filtradas (por defecto).
+#       - "indices": no se modifica el dataset y se devuelven los índices de las variables
+#                    que se mantienen.
+#       - "vista": no se modifica el dataset y se devuelve una vista (dataset s4 que comparte
+#                  las columnas con el original) con las variables que se mantienen.
 # Output:
-#   -
+#   - None, la lista de índices o la vista, según el modo.
 
-def filtrar_por_condicion(dataset, tipo, condicion, umbral, supervisado=False, variable_clase=None):
+@perfil.instrumentar
+def filtrar_por_condicion(dataset, tipo, condicion, umbral, supervisado=False, variable_clase=None, aproximado=False, num_buckets=256, modo="eliminar"):
 
     if condicion not in ["menor", "mayor", "igual", "desigual"]:
         print("Condición no valida. Condiciones válidas:\n\tmenor\n\tmayor\n\tigual\n\tdesigual") 
@@ -626,6 +2248,10 @@ def filtrar_por_condicion(dataset, tipo, condicion, umbral, supervisado=False, v
     if tipo not in ["AUC", "Varianza", "Entropia"]:
         print("Tipo no válido. Los tipos válidos son:\n\tAUC\n\tVarianza\n\tEntropia")
         return
+
+    if modo not in ["eliminar", "indices", "vista"]:
+        print("Modo no válido. Los modos válidos son:\n\teliminar\n\tindices\n\tvista")
+        return
     
     # Función que evalúa la condición sobre un valor dado.
     # (Es usada para evitar redundancias en el código)
@@ -647,29 +2273,74 @@ def filtrar_por_condicion(dataset, tipo, condicion, umbral, supervisado=False, v
             print("Condición no válida")
             return None
 
-    clase = [row[variable_clase] for row in dataset.data] if supervisado else None
+    clase = columna_codificada(dataset, variable_clase) if supervisado else None
     indices_a_eliminar = []
-    
-    for i, columna in enumerate(zip(*dataset.data)):
 
-        # Evitar que la variable clase se elimine en un dataset supervisado
-        if supervisado and i == variable_clase:
-            continue
+    with perfil.etapa("metricas", dataset.numero_individuos, dataset.numero_variables):
 
-        # Seleccionar métrica según el tipo especificado
+        # El AUC de todas las variables numéricas se calcula en una sola llamada
+        aucs = {}
         if supervisado and tipo == "AUC":
-            valor_metrica = calcular_auc(clase, columna)
+            numericas = [i for i in range(dataset.numero_variables) if i != variable_clase and dataset.tipo(i) == s4.NUMERICA]
+
+            valores = []
+            if aproximado and numericas:
+
+                # Los límites de los histogramas son el mínimo y el máximo
+                # exactos de cada columna (guardados en el caché del dataset)
+                estadisticos = Estadisticos.desde_dataset(dataset, numericas)
+                valores, cotas = calcular_auc_aproximado(_lotes_dataset(dataset, variable_clase, numericas), num_buckets,
+                                                         estadisticos.minimo, estadisticos.maximo)
+
+                # Si el umbral está a menos de la cota del error del AUC
+                # aproximado, la condición no se puede decidir con él y se
+                # calcula el AUC exacto de esas columnas
+                dudosas = [k for k in range(len(valores)) if abs(valores[k] - umbral) <= cotas[k]]
+                if dudosas:
+                    valores[dudosas] = _aucs_dataset(dataset, variable_clase, clase, [numericas[k] for k in dudosas])
+
+            elif numericas:
+                valores = _aucs_dataset(dataset, variable_clase, clase, numericas)
+
+            aucs = dict(zip(numericas, list(valores)))
+    
+        for i in range(dataset.numero_variables):
+
+            # Evitar que la variable clase se elimine en un dataset supervisado
+            if supervisado and i == variable_clase:
+                continue
+
+            columna = columna_codificada(dataset, i)
+
+            # Seleccionar métrica según el tipo especificado. Las variables a
+            # las que no se aplica la métrica se mantienen.
+            if i in aucs:
+                valor_metrica = aucs[i]
         
-        elif es_numerica(columna) and tipo == "Varianza":
-            valor_metrica = calcular_varianza(columna)
+            elif dataset.tipo(i) == s4.NUMERICA and tipo == "Varianza":
+                valor_metrica = float(Estadisticos.desde_dataset(dataset, [i]).varianza[0])
         
-        elif not es_numerica(columna) and tipo == "Entropia":
-            valor_metrica = calcular_entropia(columna)
+            elif dataset.tipo(i) != s4.NUMERICA and tipo == "Entropia":
+                valor_metrica = calcular_entropia(columna)
+
+            else:
+                continue
         
-        # Filtrar variable si no cumple la condición
-        if cumple_condicion(valor_metrica):
-            indices_a_eliminar.append(i)
+            # Filtrar variable si no cumple la condición
+            if cumple_condicion(valor_metrica):
+                indices_a_eliminar.append(i)
+
+    if modo == "eliminar":
+        # Eliminar todas las columnas filtradas de una vez
+        with perfil.etapa("eliminacion", columnas=len(indices_a_eliminar)):
+            dataset.eliminar_variables(indices_a_eliminar)
+        return
+
+    eliminar = set(indices_a_eliminar)
+    indices = [i for i in range(dataset.numero_variables) if i not in eliminar]
+
+    if modo == "indices":
+        return indices
 
-    # Ordenar índices en orden descendente y eliminar columnas
-    for i in sorted(indices_a_eliminar, reverse=True):
-        dataset.eliminar_variable(i)
\ No newline at end of file
+    with perfil.etapa("proyeccion", columnas=len(indices)):
+        return dataset.proyectar(indices)
\ No newline at end of file
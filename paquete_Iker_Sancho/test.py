@@ -57,6 +57,15 @@ except (TypeError, ValueError, IndexError) as e:
 #========================#
 print(dataset_num_cat)
 
+# Eliminar un individuo y añadir otro que convierte la variable numérica en
+# categórica: el individuo eliminado no debe contarse en las frecuencias
+dataset_promocion = s4.S4Dataset([[1]] * 9 + [[2]])
+dataset_promocion.eliminar_individuo(9)
+dataset_promocion.añadir_individuo(["a"])
+print(dataset_promocion.frecuencias(0), dataset_promocion.tipos)
+assert dataset_promocion.frecuencias(0) == {1: 9, "a": 1}
+assert dataset_promocion.tipos == [s4.BINARIA]
+
 dataset_num_cat.print_dataset_data()
 
 dataset_num_cat.añadir_variable([0,0,0,"C","C"])